@@ -0,0 +1,108 @@
+"""
+Before/after numbers for the ding: audio CPU time per tick, and how long from asking for the ding to the
+play call having returned on whichever thread makes it (the mixer takes it from there either way).
+
+Before: every tick ran init_sound() (mixer.init() and mixer.music.load() of the mp3), and the ding went through
+a ThreadPoolExecutor to mixer.music.play(). After: the ding is decoded once on the audio worker, ticks don't
+touch audio at all, and the ding is a channel.play() of the buffer.
+
+Run from the repo root:
+    python3 benchmarks/ding.py
+    SDL_AUDIODRIVER=dummy python3 benchmarks/ding.py  (no sound card, still measures the decoding)
+"""
+import argparse
+import concurrent.futures
+import os
+import statistics
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+os.chdir(SRC)  # resource_path() is relative to the working directory outside PyInstaller
+
+from utilities import resource_path, get_ding_resource
+from utilities.audio import mixer
+from utilities.audio_worker import AudioWorker
+
+BUSY_TIMEOUT = 1.0
+
+
+def wait_busy(is_busy):
+    """
+    Spins until is_busy() is true.
+
+    :return: float seconds until it did, None if it never did
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < BUSY_TIMEOUT:
+        if is_busy():
+            return time.perf_counter() - started
+        time.sleep(0)  # let go of the GIL, or the worker waits out a whole switch interval (5 ms)
+    return None
+
+
+def ms(seconds):
+    return f"{seconds * 1000:.3f} ms" if seconds is not None else "n/a"
+
+
+def before(sound, ticks, dings):
+    tick_cpu = []
+    for _ in range(ticks):
+        started = time.process_time()
+        mixer.init()
+        mixer.music.load(sound)
+        tick_cpu.append(time.process_time() - started)
+    executor = concurrent.futures.ThreadPoolExecutor()
+    latency = []
+    for _ in range(dings):
+        mixer.music.stop()
+        started = time.perf_counter()
+        executor.submit(mixer.music.play).result()
+        latency.append(time.perf_counter() - started)
+    mixer.music.stop()
+    executor.shutdown()
+    return tick_cpu, latency
+
+
+def after(sound, dings):
+    worker = AudioWorker(sound)
+    worker.start()
+    if wait_busy(lambda: worker.player is not None) is None:
+        sys.exit("the audio worker never loaded the ding")
+    latency = []
+    for _ in range(dings):
+        worker.stop()
+        played = worker.stats()["played"]
+        started = time.perf_counter()
+        worker.play()
+        done = wait_busy(lambda: worker.stats()["played"] > played)
+        latency.append(time.perf_counter() - started if done is not None else None)
+    worker.close()
+    return latency
+
+
+def summary(samples):
+    samples = [sample for sample in samples if sample is not None]
+    if not samples:
+        return "n/a (no audio device?)"
+    return f"median {ms(statistics.median(samples))}, max {ms(max(samples))}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--dings", type=int, default=20)
+    args = parser.parse_args()
+    sound = resource_path(get_ding_resource())
+    tick_cpu, old_latency = before(sound, args.ticks, args.dings)
+    mixer.quit()
+    new_latency = after(sound, args.dings)
+    print(f"audio per tick, before: {summary(tick_cpu)} CPU")
+    print("audio per tick, after:  none, ticks don't touch audio")
+    print(f"ding start, before: {summary(old_latency)}")
+    print(f"ding start, after:  {summary(new_latency)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Before/after numbers for status readers: the shared memory segment against the JSON status file it sits beside.
+
+Reader side: StatusReader.read() and .sequence() against opening ~/dhv_timer.txt and json.load()ing it, which is
+what a poller had to do before. Writer side: StatusSegment.write() against StatusWriter.write_atomic()
+(temp file, write, rename), the part of a status file write that happens on the writer thread.
+
+Run from the repo root:
+    python3 benchmarks/status_segment.py
+Everything goes to a throwaway folder, the running timer's files aren't touched.
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from utilities.status_segment import StatusSegment, StatusReader
+from utilities.status_writer import StatusWriter
+
+STATUS = {"text": "6:42", "class": "yellow", "alt": "Temp: 375°F", "tooltip": "Stage 2 of 3"}
+
+
+def rate(call, count):
+    """
+    :return: float, median seconds per call over five batches of count calls
+    """
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(count):
+            call()
+        timings.append((time.perf_counter() - started) / count)
+    return statistics.median(timings)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def us(seconds):
+    return f"{seconds * 1e6:.2f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+    folder = tempfile.mkdtemp(prefix="dhv-bench-")
+    atexit.register(shutil.rmtree, folder, ignore_errors=True)
+    status_file = os.path.join(folder, "dhv_timer.txt")
+    segment = StatusSegment(os.path.join(folder, "dhv_timer.status"))
+    writer = StatusWriter(status_file)
+    segment.write(402, 600, 2, True, False, False, STATUS["class"], STATUS["text"])
+    writer.write_atomic(json.dumps(STATUS))
+    reader = StatusReader(segment.path)
+
+    segment_read = rate(reader.read, args.reads)
+    segment_sequence = rate(reader.sequence, args.reads)
+    json_read = rate(lambda: read_json(status_file), args.reads // 10)
+    print(f"reader, before: open + json.load {us(json_read)}, {1 / json_read:,.0f} reads/s")
+    print(f"reader, after:  read() {us(segment_read)}, {1 / segment_read:,.0f} reads/s; "
+          f"sequence() {us(segment_sequence)}, {1 / segment_sequence:,.0f} checks/s")
+
+    tick = [0]
+
+    def segment_write():
+        tick[0] += 1
+        segment.write(tick[0], 600, 2, True, False, False, "yellow", f"{tick[0] // 60}:{tick[0] % 60:02}")
+
+    def file_write():
+        tick[0] += 1
+        writer.write_atomic(json.dumps(dict(STATUS, text=f"{tick[0] // 60}:{tick[0] % 60:02}")))
+
+    print(f"writer, status file (write_atomic): {us(rate(file_write, args.writes))}")
+    print(f"writer, segment (write):            {us(rate(segment_write, args.writes))}")
+    reader.close()
+    writer.close()
+    segment.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Before/after numbers for the timer text: what a tick spends working out its m:ss text and status class,
+and a whole update_timer() call on a VirtualClock session either way.
+
+Before: every tick ran divmod and an f-string on the elapsed (or remaining) seconds, then bisected for the
+stage class. After: the profile builds the (m:ss, -m:ss, class) table for every second when it compiles,
+and a tick is one index into it.
+
+Run from the repo root:
+    python3 benchmarks/tick.py
+Everything runs offscreen against throwaway settings, history and status files.
+"""
+import argparse
+import atexit
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+os.chdir(SRC)  # resource_path() is relative to the working directory outside PyInstaller
+
+# before Qt gets imported, keep the real settings, ~/dhv_timer.txt and history out of it
+HOME = tempfile.mkdtemp(prefix="dhv-bench-")
+atexit.register(shutil.rmtree, HOME, ignore_errors=True)
+os.environ["HOME"] = HOME
+for variable in ("XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_CACHE_HOME", "XDG_RUNTIME_DIR"):
+    os.environ[variable] = os.path.join(HOME, variable.lower())
+    os.makedirs(os.environ[variable], mode=0o700)
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+from PyQt6.QtCore import QCoreApplication
+from utilities.clock import VirtualClock
+from utilities.profiles import SessionProfile, Stage
+from utilities.session_timer import SessionTimer
+
+
+def old_label(session, elapsed_time, inverted):
+    """
+    handle_timer_label() as it was, minus sending the result out.
+    """
+    if not inverted:
+        minutes = elapsed_time // 60
+        seconds = elapsed_time % 60
+        timer_text = f"{minutes}:{seconds:02}"
+    else:
+        remaining = session.end - elapsed_time
+        minutes = remaining // 60
+        seconds = remaining % 60
+        timer_text = f"-{minutes}:{seconds:02}"
+    return timer_text, session.stage_class(session.stage_at(elapsed_time))
+
+
+def new_label(session, elapsed_time, inverted):
+    normal_text, inverted_text, stage_class = session.labels[elapsed_time]
+    return (inverted_text if inverted else normal_text), stage_class
+
+
+def per_tick(label, session, rounds):
+    """
+    :return: float, median seconds per tick over rounds passes through the whole session
+    """
+    timings = []
+    seconds = range(session.end + 1)
+    for run in range(rounds):
+        inverted = bool(run % 2)
+        started = time.perf_counter()
+        for second in seconds:
+            label(session, second, inverted)
+        timings.append((time.perf_counter() - started) / len(seconds))
+    return statistics.median(timings)
+
+
+def old_handle_timer_label(timer):
+    def handle_timer_label():
+        timer_text, stage_class = old_label(timer.session, timer.elapsed_time, timer.prefs.inverted_time)
+        timer.ticked.emit(timer_text, stage_class)
+        timer.write_txt_file(timer_text, stage_class)
+        timer.command_server.publish("tick", status=timer.status())
+    return handle_timer_label
+
+
+def update_timer_cost(sessions, old):
+    """
+    Runs whole default sessions on a VirtualClock and times each update_timer() call.
+
+    :return: list of seconds per call
+    """
+    clock = VirtualClock()
+    timer = SessionTimer(clock=clock)
+    timer.store.update(notifications=False, almightyDing=False)
+    if old:
+        timer.handle_timer_label = old_handle_timer_label(timer)
+    timings = []
+    update_timer = timer.update_timer
+
+    def timed():
+        started = time.perf_counter()
+        update_timer()
+        timings.append(time.perf_counter() - started)
+
+    timer.update_timer = timed
+    timer.timer.callback = timed
+    for _ in range(sessions):
+        timer.start_timer()
+        clock.run()
+    timer.close()
+    return timings
+
+
+def us(seconds):
+    return f"{seconds * 1e6:.2f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=50, help="passes through every second of the profile")
+    parser.add_argument("--sessions", type=int, default=5, help="whole sessions for the update_timer() numbers")
+    args = parser.parse_args()
+    app = QCoreApplication([])
+    profile = SessionProfile("Default", (Stage("350", 6), Stage("375", 2), Stage("400", 2)))
+    started = time.perf_counter()
+    session = profile.compile()
+    compile_time = time.perf_counter() - started
+    for second in range(session.end + 1):
+        for inverted in (False, True):
+            assert old_label(session, second, inverted) == new_label(session, second, inverted), second
+    print(f"compiling the 10 minute profile, table included: {compile_time * 1000:.3f} ms")
+    print(f"text and class per tick, before: {us(per_tick(old_label, session, args.rounds))}")
+    print(f"text and class per tick, after:  {us(per_tick(new_label, session, args.rounds))}")
+    old = update_timer_cost(args.sessions, old=True)
+    new = update_timer_cost(args.sessions, old=False)
+    print(f"update_timer() per tick, before: median {us(statistics.median(old))}, max {us(max(old))}")
+    print(f"update_timer() per tick, after:  median {us(statistics.median(new))}, max {us(max(new))}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
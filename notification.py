@@ -4,7 +4,9 @@ Module of MacOS API for plyer.notification.
 # OVERWRITE venv/lib/plyer/platforms/macosx/notification.py
 from plyer.facades import Notification
 
-import os
+import subprocess
+
+OSASCRIPT_TIMEOUT = 5  # seconds, don't let a wedged notification center hang the timer
 
 class OSXNotification(Notification):
     '''
@@ -23,7 +25,10 @@ class OSXNotification(Notification):
         soundname_text = f'sound name "{sound_name}"'
 
         notification_text = f'display notification "{message}" {title_text} {subtitle_text} {soundname_text}'
-        os.system(f"osascript -e '{notification_text}'")
+        try:
+            subprocess.run(["osascript", "-e", notification_text], timeout=OSASCRIPT_TIMEOUT, check=False)
+        except subprocess.TimeoutExpired:
+            pass
 
 def instance():
     '''
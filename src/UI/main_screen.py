@@ -6,77 +6,86 @@ from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
     QCheckBox,
+    QComboBox,
     QLabel,
     QPushButton,
     QVBoxLayout,
     QHBoxLayout,
     QWidget,
 )
-from PyQt6.QtCore import QTimer, Qt, QSettings
+from PyQt6.QtCore import QTimer, Qt, QEvent
 from PyQt6.QtGui import QKeySequence, QShortcut
-from pygame import mixer
-import os
-from utilities import resource_path, get_ding_resource
-import concurrent.futures
-from sys import platform
+from utilities.session_timer import SessionTimer
 from .settings_screen import SettingsWindow
-from plyer import notification
-import json
-
-
-DEBUG_TIME = 60 # Prod - 60
 
 
 class TimerApp(QMainWindow):
     """
-    Class to hold the main window layout and logic. Main window of the application
+    Class to hold the main window layout. Main window of the application.
+    The timer itself lives in self.core (a SessionTimer), this shows it and passes the clicks along.
     """
 
-    def __init__(self):
+    def __init__(self, status_stream=None, clock=None, profiler=None):
         """
-        initialize the main window, settings, and concurrent stream executor.
+        initialize the main window and the timer behind it.
 
+        :param name: status_stream: Optional StreamWriter that gets every status update (--waybar mode)
+        :param name: clock: What the session runs on, SystemClock unless you're fast forwarding with a VirtualClock
+        :param name: profiler: Optional TickProfiler to time the tick path with (--profile-ticks)
         :return: None
         """
         super().__init__()
-        
-        self.settings = QSettings(
-            "UnquenchedServant", "DHV-Session-Timer"
-        )  # initialize settings
-        self.sound = resource_path(get_ding_resource())  # This is the almighty ding
-        if self.settings.value("keep_active_default", "False") == "True":
+        self.core = SessionTimer(status_stream, clock, self, profiler)
+        self.profiler = profiler
+        self.settings = self.core.settings
+        self.store = self.core.store
+        self.prefs = self.core.prefs
+        self.library = self.core.library
+        if self.prefs.keep_active_default:
             self.keep_on_top = True  # Grab the default keep on top setting
             self.setWindowFlags(Qt.WindowType.WindowStaysOnTopHint)
         else:
             self.keep_on_top = False
             self.setWindowFlags(Qt.WindowType.Widget)
-        self.executor = (
-            concurrent.futures.ThreadPoolExecutor()
-        )  # Needed for running the sound asynchronously
-        self.started = False
-        self.is_complete = False  # Used to check if the session is complete, helps with the start button efficiency
-        self.initVariables()
-        self.write_txt_file("0:00", "4")
+        self.warmed_up = False
+        self.settings_window = None  # built the first time it's opened, then reused
+        self.render_visible = False  # whether anyone can see the window, see update_render_visible()
+        self.render_pending = False  # a tick skipped its label update while we were out of sight
         self.initUI()
+        if profiler is not None:
+            profiler.wrap(self, "handle_tick", "render")  # before it's connected, or the signal keeps the old one
+            self.profile_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+            self.profile_shortcut.activated.connect(profiler.dump)
+        self.core.ticked.connect(self.handle_tick)
+        self.core.stage_changed.connect(self.temp_label.setText)
+        self.core.state_changed.connect(self.handle_state_changed)
+        self.core.profile_changed.connect(self.handle_profile_changed)
+        self.core.show_requested.connect(self.bring_to_front)
+        self.core.resume()  # a session that was running when we last went down carries on
+
+    def handle_profile_changed(self):
+        """
+        Picks up a new profile or temp unit. A running session keeps the profile it started with.
 
-    def write_txt_file(self, timer_text, stage="1"):
-        timer_file = os.path.expanduser("~/dhv_timer.txt")
-        color_class = {"1":"green", "2":"yellow", "3": "red", "4": "white"}
-        data = {
-            "text": timer_text,
-            "class": color_class.get(stage, "green")
-        }
-        with open(timer_file, "w") as f:
-            f.write(json.dumps(data))
-
-    def initVariables(self):
-        self.temp1 = self.settings.value("temp1", "350")
-        self.temp2 = self.settings.value("temp2", "375")
-        self.temp3 = self.settings.value("temp3", "400")
-        self.time2 = int(self.settings.value("time2", "4"))
-        self.time3 = int(self.settings.value("time3", "8"))
-        self.time4 = int(self.settings.value("time4", "10"))
-        self.temp_type = self.settings.value("temp_unit", "F")
+        :return: None
+        """
+        if not self.core.started and not self.core.is_complete:
+            self.temp_label.setText(self.core.first_temp_text())
+        self.refresh_profile_box()
+
+    def refresh_profile_box(self):
+        """
+        Fills the profile dropdown from the library. It's hidden when Default is the only profile.
+
+        :return: None
+        """
+        names = self.library.names()
+        self.profile_box.blockSignals(True)
+        self.profile_box.clear()
+        self.profile_box.addItems(names)
+        self.profile_box.setCurrentText(self.core.profile.name)
+        self.profile_box.blockSignals(False)
+        self.profile_box.setVisible(len(names) > 1)
 
     def initUI(self):
         """
@@ -94,13 +103,19 @@ class TimerApp(QMainWindow):
         # the timer label has to be nice and big and bold
         self.timer_label = QLabel("0:00", self)
         self.timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.timer_label.setStyleSheet("font-size: 48px; font-weight: bold;")
+        self.timer_label.setObjectName("timer_label")  # styled in asset/style.qss, by its state property
+        self.label_state = None
+        self.set_label_state("idle")
         self.timer_label.mousePressEvent = self.handle_timer_click
 
         # the temp label is smaller and gray. Still mighty, but not as mighty.
-        self.temp_label = QLabel(f"Temp: {self.temp1}°{self.temp_type}", self)
+        self.temp_label = QLabel(self.core.first_temp_text(), self)
         self.temp_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.temp_label.setStyleSheet("font-size: 12px; color: gray;")
+        self.temp_label.setObjectName("temp_label")
+
+        self.profile_box = QComboBox(self)
+        self.refresh_profile_box()
+        self.profile_box.currentTextChanged.connect(self.core.switch_profile)
 
         self.keep_active_checkbox = QCheckBox(
             "Keep Win on Top", self
@@ -111,15 +126,13 @@ class TimerApp(QMainWindow):
         self.keep_active_checkbox.stateChanged.connect(self.handleWindow)
 
         self.start_button = QPushButton("Start", self)
-        self.start_button.clicked.connect(self.start_timer)
+        self.start_button.clicked.connect(self.core.start_timer)
 
         self.reset_button = QPushButton("Reset", self)
-        self.reset_button.clicked.connect(self.reset_timer)
+        self.reset_button.clicked.connect(self.core.reset_timer)
 
         self.settings_button = QPushButton("Settings", self)
         self.settings_button.clicked.connect(self.open_settings)
-        if not self.is_complete:
-            self.settings_button.isEnabled = False
 
         # Let's lay this out
         layout = QVBoxLayout()  # Lil vertical box to hold everything
@@ -136,6 +149,7 @@ class TimerApp(QMainWindow):
         # Adds widgets/layouts in the following order: timer, temp, start/reset buttons, settings button
         layout.addWidget(self.timer_label)
         layout.addWidget(self.temp_label)
+        layout.addWidget(self.profile_box)
         layout.addLayout(start_reset_layout)
         layout.addLayout(settings_checkbox_layout)
 
@@ -144,22 +158,51 @@ class TimerApp(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_timer)
-
-        self.click_timer = QTimer(self)
-        self.click_timer.timeout.connect(self.check_waybar_click)
-        self.click_timer.start(10)
+        # Spacebar to start/stop the timer
+        self.start_shortcut = QShortcut(QKeySequence("Space"), self)
+        self.start_shortcut.activated.connect(self.core.toggle)
 
-        self.invert_timer = QTimer(self)
-        self.invert_timer.timeout.connect(self.check_waybar_inverse)
-        self.invert_timer.start(10)
+    def showEvent(self, event):
+        """
+        Once the window is showing, queue up the timer's warm_up() for when the event loop is idle.
 
-        self.elapsed_time = 0
+        :return: None
+        """
+        super().showEvent(event)
+        if not self.warmed_up:
+            self.warmed_up = True
+            self.windowHandle().installEventFilter(self)  # expose events go to the window, not to us
+            QTimer.singleShot(0, self.core.warm_up)
+        self.update_render_visible()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_render_visible()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.update_render_visible()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Expose:
+            self.update_render_visible()
+        return False
+
+    def update_render_visible(self):
+        """
+        Works out if the window can be seen at all (not hidden, minimized, or covered/off on another workspace,
+        which the window system tells us by un-exposing it). While it can't, ticks skip the label updates.
+        When it comes back, the label catches up in one go.
 
-        # Spacebar to start/stop the timer
-        self.start_shortcut = QShortcut(QKeySequence("Space"), self)
-        self.start_shortcut.activated.connect(self.handle_spacebar)
+        :return: None
+        """
+        handle = self.windowHandle()
+        self.render_visible = handle is not None and handle.isExposed() and not self.isMinimized()
+        if self.render_visible and self.render_pending:
+            self.render_pending = False
+            self.timer_label.setText(self.core.status_text)
+            self.set_label_state(self.core.status_class)
 
     def closeEvent(self, event):
         """
@@ -168,21 +211,17 @@ class TimerApp(QMainWindow):
         :return: None
         """
         self.settings.setValue("geometry", self.saveGeometry())
+        self.core.close()
 
-    def check_waybar_click(self):
-        click_file = os.path.expanduser("~/dhv_timer_click1")
-        if os.path.exists(click_file):
-            if self.started:
-                self.reset_timer()
-            else:
-                self.start_timer()
-            os.remove(click_file)
-    
-    def check_waybar_inverse(self):
-        click_file = os.path.expanduser("~/dhv_timer_click2")
-        if os.path.exists(click_file):
-            self.settings.setValue("inverted_time", "True" if self.settings.value("inverted_time", "False") == "False" else "False")
-            os.remove(click_file)
+    def bring_to_front(self):
+        """
+        Shows the window and gives it focus, for when the timer gets launched again while already running.
+
+        :return: None
+        """
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
 
     def handleWindow(self):
         """
@@ -200,24 +239,13 @@ class TimerApp(QMainWindow):
             self.keep_on_top = False
             self.show()
 
-    def handle_spacebar(self):
-        """
-        Space bar acts as a start/stop button. If the timer is active, reset the timer. If the timer isn't active, start the timer.
-
-        :return: None
-        """
-        if self.timer.isActive():
-            self.reset_timer()
-        else:
-            self.start_timer()
-            
     def handle_mouse_click(self, mouse_button):
-        action = self.settings.value(mouse_button, "Start Timer")
+        action = self.store.get(mouse_button)
         if action == "Start Timer":
-            self.start_timer()
+            self.core.start_timer()
         elif action == "Invert Time":
-            self.settings.setValue("inverted_time", "True" if self.settings.value("inverted_time", "False") == "False" else "False")
-            self.handle_timer_label()
+            self.core.toggle_inverted()
+            self.core.handle_timer_label()
         elif action == "Do Nothing":
             pass
 
@@ -229,128 +257,59 @@ class TimerApp(QMainWindow):
         elif event.button() == Qt.MouseButton.MiddleButton:
             self.handle_mouse_click("middle_mouse_action")
 
-    def start_timer(self):
+    def handle_tick(self, timer_text, stage_class):
+        if self.render_visible:
+            self.timer_label.setText(timer_text)
+            self.set_label_state(stage_class)
+        else:
+            self.render_pending = True  # nobody's looking, update_render_visible() catches up later
+
+    def handle_state_changed(self):
         """
-        This is done for efficiency sake.
-        Allows the user to press the start button at the end of a completed session to start a new one, but
-        reset_timer() takes a little time, which isn't great when you want to start a timer.
-        This only calls reset_timer() if the timer is active, otherwise it starts the timer without doing that.
+        Sets the buttons and labels for a session that just started, got reset, or finished.
 
         :return: None
         """
-        if self.started:
-            self.reset_timer()
+        self.render_pending = False  # the label gets set straight away below, or on the next tick
+        running = self.core.started
+        self.start_button.setText("Stop/Reset" if running else "Start")
+        self.settings_button.setEnabled(not running)
+        self.profile_box.setEnabled(not running)
+        if running:
+            return
+        if self.core.is_complete:
+            self.timer_label.setText("Done!")
+            self.set_label_state("done")
         else:
-            if self.is_complete:  # Our friend is_complete is here!
-                self.is_complete = False  # No longer is_complete
-                self.reset_timer()  # reset everything, just in case (if the user hits start after the session ends to start a new one)
-            self.started = True
-            self.start_button.setText("Stop/Reset")
-            self.settings_button.setEnabled(False)
-            self.timer.start(1000)  # 1000 ms = 1 second
-
-    def reset_timer(self):
+            self.timer_label.setText("0:00")
+            self.set_label_state("idle")
+            self.temp_label.setText(self.core.first_temp_text())
+
+    def set_label_state(self, state):
         """
-        Handles resetting the timer. Stops the timer, sets the elapsed_time variable to 0,
-        sets the timer_label text to 0:00, and shows the first temp label again (as this would have been hidden at the end of
-        the session)
+        Flips the timer label's state property and repolishes it, the looks come from the app style sheet.
+        Cheaper than setStyleSheet, which makes Qt parse the CSS all over again.
 
+        :param name: state: idle, green/yellow/red (first/middle/last stage) or done
         :return: None
         """
-        self.stop_timer(finished=False)
-        self.elapsed_time = 0
-        self.timer_label.setText("0:00")
-        self.timer_label.setStyleSheet("font-size: 48px; font-weight: bold;")
-        self.temp_label.setText(f"Temp: {self.temp1}°{self.temp_type}")
+        if state == self.label_state:
+            return
+        self.label_state = state
+        self.timer_label.setProperty("state", state)
+        style = self.timer_label.style()
+        style.unpolish(self.timer_label)
+        style.polish(self.timer_label)
 
     def open_settings(self):
-        """        self.settings_button.disconnect()
-
+        """
         Opens the settings, connected to self.settings_button.
 
         :return: None
         """
-        settings_window = SettingsWindow(self.settings)
-        if settings_window.exec():
-            # Updates the temp label to reflect the new temp settings
-            self.temp_label.setText(
-                f"Temp: {self.temp1}°{self.temp_type}"
-            )
-
-    def handle_time_change(self, temp, stage):
-        if stage == "2" or stage == "3":
-            message = f"Temp: {temp}°{self.temp_type}"
-            title = f"DHV - Stage {stage}"
-            self.temp_label.setText(f"Temp: {temp}°{self.temp_type}")
-        elif stage == "end":
-            message = "Session Done!"
-            title = "DHV - Done"
-            self.temp_label.setText("Session Done!")
-        self.handle_notification(title, message)
-        if self.settings.value('almightyDing', 'True') == "True":
-            self.executor.submit(mixer.music.play)  
-
-    def handle_notification(self, title, message):
-        notif_on = True if self.settings.value('notifications', "True") == "True" else False
-        timeout = int(self.settings.value("timeout", "10000")) if not platform == "darwin" else 0
-        if notif_on:
-            notification.notify(title=f"{title}", message=f"{message}", timeout=timeout, app_name="DHVSessionTimer")
-
-    def init_sound(self):
-        mixer.init()
-        mixer.music.load(self.sound)
-
-    def handle_timer_label(self):
-        if self.settings.value("inverted_time", "False") == "False":
-            minutes = self.elapsed_time // 60
-            seconds = self.elapsed_time % 60
-            timer_text = f"{minutes}:{seconds:02}"
-        else:
-            remaining = (self.time4 * DEBUG_TIME) - self.elapsed_time
-            minutes = remaining // 60
-            seconds = remaining % 60
-            timer_text = f"-{minutes}:{seconds:02}"
-        if self.elapsed_time < self.time2 * DEBUG_TIME:
-            stage = "1"
-        elif self.elapsed_time < self.time3 * DEBUG_TIME:
-            stage = "2"
-        elif self.elapsed_time < self.time4 * DEBUG_TIME:
-            stage = "3"
+        if self.settings_window is None:
+            self.settings_window = SettingsWindow(self.store, self.library)
         else:
-            stage = "4"
-        self.timer_label.setText(timer_text)
-        self.write_txt_file(timer_text, stage)
-
-    def stop_timer(self, finished=False):
-        self.timer.stop()
-        self.started = False
-        self.start_button.setText("Start")
-        self.settings_button.setEnabled(True)
-        self.is_complete = finished
-        self.write_txt_file("0:00", "4")
-        if finished:
-            self.timer_label.setText("Done!")
-            self.timer_label.setStyleSheet("font-size: 38px; color: #9cb9d3; font-weight: bold;")
-
-    def update_timer(self):
-        """
-        Called every second by the timer.
-        Increments the elapsed_time variable by 1, converts the seconds to a human readable format (mm:ss),
-        and updates the timer_label text to the new time. At user set intervals (default 6, 8, and 10 minutes), it will ding
-        indicating that either an increase in temperature is needed or the session is complete. If the session is complete,
-        it will show that in green text and the temperature label will hide, also stopping the timer so that update_timer()
-        is no longer called
-
-        :return: None
-        """
-        self.elapsed_time += 1
-        self.handle_timer_label()
-        self.init_sound()
-        
-        if self.elapsed_time == self.time2 * DEBUG_TIME:
-            self.handle_time_change(self.temp2, "2")
-        elif self.elapsed_time == self.time3 * DEBUG_TIME:
-            self.handle_time_change(self.temp3, "3")
-        elif self.elapsed_time == self.time4 * DEBUG_TIME:
-            self.handle_time_change("350", "end")
-            self.stop_timer(finished=True)
+            self.settings_window.refresh()
+        self.settings_window.exec()  # anything saved comes back through the timer's handle_setting_changed
+        self.refresh_profile_box()  # might have saved a new profile
@@ -5,28 +5,33 @@ from PyQt6.QtWidgets import QComboBox, QLineEdit, QCheckBox, QFormLayout, QDialo
 from PyQt6.QtGui import QIntValidator
 import math
 from sys import platform
+from utilities.settings_store import AppSettings
+from utilities.profiles import profile_from_settings
+from utilities.profile_library import DEFAULT_PROFILE, MAX_NAME_BYTES
 
 class SettingsWindow(QDialog):
     """
     Class to hold the settings window layout and logic.
     """
-    def __init__(self, settings):
+    def __init__(self, store, library=None):
         """
         Initialize the settings window.
 
-        :param name: settings: The QSettings object to save the settings
+        :param name: store: The SettingsStore to read and save the settings
+        :param name: library: The ProfileLibrary to save named profiles to, no Save as Profile button without one
         :return: None
         """
         super().__init__()
-        self.settings = settings
-        self.keep_active = self.settings.value('keep_active_default', False, type=bool)
-        self.notifications = self.settings.value('notifications', True, type=bool)
-        self.almightyDing = self.settings.value('almightyDing', True, type=bool)
+        self.store = store
+        self.library = library
+        self.prefs = store.values
         self.initUI()
+        self.refresh()
         
     def initUI(self):
         """
         Initializes the UI for the settings window. Sets the window title, creates the widgets needed, and lays them out.
+        The values get filled in by refresh().
 
         :return: None
         """
@@ -40,37 +45,31 @@ class SettingsWindow(QDialog):
         
         self.temp1_input = QLineEdit(self)
         self.temp1_input.setValidator(onlyInt)
-        self.temp1_input.setText(self.settings.value('temp1', '350'))
         self.temp1_input.setFixedWidth(40) # 40 works, so 40 works. 
         temp_layout.addRow('Temp 1:', self.temp1_input)
         
         self.temp2_input = QLineEdit(self) # repeat 2 more times for temp 2 and 3
         self.temp2_input.setValidator(onlyInt)
-        self.temp2_input.setText(self.settings.value('temp2', '375'))
         self.temp2_input.setFixedWidth(40)
         temp_layout.addRow('Temp 2:', self.temp2_input)
         
         self.temp3_input = QLineEdit(self)
         self.temp3_input.setValidator(onlyInt)
-        self.temp3_input.setText(self.settings.value('temp3', '400'))
         self.temp3_input.setFixedWidth(40)
         temp_layout.addRow('Temp 3:', self.temp3_input)
 
         self.temp_unit = QComboBox(self)
         self.temp_unit.addItems(['F', 'C']) # temperature unit combo box
-        self.temp_unit.setCurrentText(self.settings.value('temp_type', 'F'))
         self.temp_unit.currentIndexChanged.connect(self.temp_unit_change) # connects to a function that converts the temperature unit
         self.temp_unit.setFixedWidth(40)
         temp_layout.addRow('Temp Unit:', self.temp_unit)
 
         self.notifications_checkbox = QCheckBox(self)
-        self.notifications_checkbox.setChecked(self.notifications)
         self.notifications_checkbox.stateChanged.connect(self.handle_notifications)
         temp_layout.addRow("Notifications:", self.notifications_checkbox)
 
         self.skip_all_updates_checkbox = QCheckBox(self)
-        self.skip_all_updates_checkbox.setChecked(not self.settings.value("skip_all_updates", False, type=bool))
-        self.skip_all_updates_checkbox.stateChanged.connect(lambda: self.settings.setValue("skip_all_updates", not self.skip_all_updates_checkbox.isChecked()))
+        self.skip_all_updates_checkbox.stateChanged.connect(lambda: self.store.set("skip_all_updates", not self.skip_all_updates_checkbox.isChecked()))
         temp_layout.addRow("Update Alerts:", self.skip_all_updates_checkbox)
 
 
@@ -89,50 +88,42 @@ class SettingsWindow(QDialog):
         
         self.time2_input = QComboBox(self)
         self.time2_input.addItems([str(i) for i in range(1,25)]) # Time 2-3 can be 1-25 minutes
-        self.time2_input.setCurrentText(self.settings.value('time2', '6')) 
         time_layout.addRow('Stg. 2 Time (min):', self.time2_input)
         
         self.time3_input = QComboBox(self)
         self.time3_input.addItems([str(i) for i in range(1,25)])
-        self.time3_input.setCurrentText(self.settings.value('time3', '8'))
         time_layout.addRow('Stg. 3 Time (min):', self.time3_input)
 
         self.time4_input = QComboBox(self)
         self.time4_input.addItems([str(i) for i in range(8,25)]) #Since 8 minutes is the lower limit for the auto-shutoff on the Solo 3, this will do
-        self.time4_input.setCurrentText(self.settings.value('time4', '10'))
         time_layout.addRow('End Time (min):', self.time4_input)
 
         if not platform == "darwin":
             self.notification_timeout = QLineEdit(self)
             self.notification_timeout.setValidator(onlyInt)
-            self.notification_timeout.setText(self.settings.value('timeout', '10000'))
             self.notification_timeout.setFixedWidth(40)
             time_layout.addRow('Notif. Timeout:', self.notification_timeout)
 
         self.almighty_ding_checkbox = QCheckBox(self)
-        self.almighty_ding_checkbox.setChecked(self.almightyDing)
         self.almighty_ding_checkbox.stateChanged.connect(self.handle_almighty_ding)
         time_layout.addRow('Ding:', self.almighty_ding_checkbox)
 
         self.left_mouse_combo = QComboBox(self)
         self.left_mouse_combo.addItems(['Start Timer', 'Invert Time', 'Do Nothing'])
-        self.left_mouse_combo.setCurrentText(self.settings.value('left_mouse_action', 'Invert Time'))
         self.left_mouse_combo.setFixedWidth(100)
-        self.left_mouse_combo.currentIndexChanged.connect(lambda: self.settings.setValue('left_mouse_action', self.left_mouse_combo.currentText()))
+        self.left_mouse_combo.currentIndexChanged.connect(lambda: self.store.set('left_mouse_action', self.left_mouse_combo.currentText()))
         time_layout.addRow('Left Mouse:', self.left_mouse_combo)
 
         self.middle_mouse_combo = QComboBox(self)
         self.middle_mouse_combo.addItems(['Start Timer', 'Invert Time', 'Do Nothing'])
-        self.middle_mouse_combo.setCurrentText(self.settings.value('middle_mouse_action', 'Do Nothing'))
         self.middle_mouse_combo.setFixedWidth(100)
-        self.middle_mouse_combo.currentIndexChanged.connect(lambda: self.settings.setValue('middle_mouse_action', self.middle_mouse_combo.currentText()))
+        self.middle_mouse_combo.currentIndexChanged.connect(lambda: self.store.set('middle_mouse_action', self.middle_mouse_combo.currentText()))
         time_layout.addRow('Middle Mouse:', self.middle_mouse_combo)
 
         self.right_mouse_combo = QComboBox(self)
         self.right_mouse_combo.addItems(['Start Timer', 'Invert Time', 'Do Nothing'])
-        self.right_mouse_combo.setCurrentText(self.settings.value('right_mouse_action', 'Start Timer'))
         self.right_mouse_combo.setFixedWidth(100)
-        self.right_mouse_combo.currentIndexChanged.connect(lambda: self.settings.setValue('right_mouse_action', self.right_mouse_combo.currentText()))
+        self.right_mouse_combo.currentIndexChanged.connect(lambda: self.store.set('right_mouse_action', self.right_mouse_combo.currentText()))
         time_layout.addRow('Right Mouse:', self.right_mouse_combo)
 
         time_widget = QWidget() # spacing again
@@ -146,7 +137,6 @@ class SettingsWindow(QDialog):
         # Add a slider to default the Windows Active setting
         self.keep_active_label = QLabel('Keep Win on Top by Default', self)
         self.keep_active_default_slider = QCheckBox(self)
-        self.keep_active_default_slider.setChecked(self.keep_active)
         self.keep_active_default_slider.stateChanged.connect(self.handle_slider)
 
         keep_active_layout = QHBoxLayout()
@@ -167,24 +157,66 @@ class SettingsWindow(QDialog):
         layout.addLayout(main_layout)
         layout.addWidget(self.error_msg)
         layout.addLayout(keep_active_layout)
+
+        if self.library is not None:
+            # Saves the temps/times above as a named profile instead of over the default ones
+            self.profile_name_input = QLineEdit(self)
+            self.profile_name_input.setPlaceholderText('Profile name')
+            self.profile_name_input.setMaxLength(MAX_NAME_BYTES)  # characters, save() checks the bytes
+            save_profile_button = QPushButton('Save as Profile', self)
+            save_profile_button.clicked.connect(self.save_profile)
+            profile_layout = QHBoxLayout()
+            profile_layout.addWidget(self.profile_name_input)
+            profile_layout.addWidget(save_profile_button)
+            layout.addLayout(profile_layout)
+
         layout.addWidget(save_button)
         layout.addWidget(reset_button)
         
         self.setLayout(layout)
 
+    def refresh(self):
+        """
+        Fills the widgets in from the current settings. The window gets reused, so this runs before every show.
+
+        :return: None
+        """
+        self.temp_unit.blockSignals(True)  # no converting, these are already in the right unit
+        self.temp_unit.setCurrentText(self.prefs.temp_type)
+        self.temp_unit.blockSignals(False)
+        self.temp1_input.setText(self.prefs.temp1)
+        self.temp2_input.setText(self.prefs.temp2)
+        self.temp3_input.setText(self.prefs.temp3)
+        self.time2_input.setCurrentText(str(self.prefs.time2))
+        self.time3_input.setCurrentText(str(self.prefs.time3))
+        self.time4_input.setCurrentText(str(self.prefs.time4))
+        if not platform == "darwin":
+            self.notification_timeout.setText(str(self.prefs.timeout))
+        self.notifications_checkbox.setChecked(self.prefs.notifications)
+        self.skip_all_updates_checkbox.setChecked(not self.prefs.skip_all_updates)
+        self.almighty_ding_checkbox.setChecked(self.prefs.almightyDing)
+        self.keep_active_default_slider.setChecked(self.prefs.keep_active_default)
+        self.left_mouse_combo.setCurrentText(self.prefs.left_mouse_action)
+        self.middle_mouse_combo.setCurrentText(self.prefs.middle_mouse_action)
+        self.right_mouse_combo.setCurrentText(self.prefs.right_mouse_action)
+        if self.library is not None:
+            active = self.prefs.active_profile
+            self.profile_name_input.setText(active if active != DEFAULT_PROFILE else '')
+        self.error_msg.hide()
+
     def handle_slider(self):
         """
         Handles the slider for the keep active default setting. 
 
         :return: None
         """
-        self.settings.setValue('keep_active_default', self.keep_active_default_slider.isChecked())
+        self.store.set('keep_active_default', self.keep_active_default_slider.isChecked())
     
     def handle_notifications(self):
-        self.settings.setValue('notifications', f"{self.notifications_checkbox.isChecked()}")
+        self.store.set('notifications', self.notifications_checkbox.isChecked())
 
     def handle_almighty_ding(self):
-        self.settings.setValue('almightyDing', f"{self.almighty_ding_checkbox.isChecked()}")
+        self.store.set('almightyDing', self.almighty_ding_checkbox.isChecked())
 
     # Allows for the settings window to be closed with the X button, and still save the settings
     def closeEvent(self, event):
@@ -221,21 +253,7 @@ class SettingsWindow(QDialog):
 
         :return: None
         """
-        self.settings.setValue('temp1', '350')
-        self.settings.setValue('temp2', '375')
-        self.settings.setValue('temp3', '400')
-        self.settings.setValue('temp_type', 'F')
-        self.settings.setValue('time2', '6')
-        self.settings.setValue('time3', '8')
-        self.settings.setValue('time4', '10')
-        self.settings.setValue("notifications", "True")
-        self.settings.setValue('keep_active_default', "False")
-        self.settings.setValue("timeout", "10000")
-        self.settings.setValue('almightyDing', "True")
-        self.settings.setValue('left_mouse_action', 'Invert Time')
-        self.settings.setValue('middle_mouse_action', 'Do Nothing')
-        self.settings.setValue('right_mouse_action', 'Start Timer')
-        self.settings.setValue("skip_all_updates", False) # Reset the skip all updates setting
+        self.store.reset(keep=('inverted_time',)) # not something this window shows, so leave it be
         self.temp1_input.setText('350')
         self.temp2_input.setText('375')
         self.temp3_input.setText('400')
@@ -254,10 +272,11 @@ class SettingsWindow(QDialog):
         self.right_mouse_combo.setCurrentText('Start Timer')
         # You got 'em
 
-    def save_settings(self):
+    def read_stages(self):
         """
-        Checks to make sure that all values for both temp and time are valid, and then
-        saves the settings to the QSettings object.
+        Checks to make sure that all values for both temp and time are valid.
+
+        :return: dict of the stage settings (temp1-3, time2-4, temp_type), or None if something's off
         """
         # First we need to get the int values for the editable settings
         temp1 = int(self.temp1_input.text())
@@ -270,36 +289,76 @@ class SettingsWindow(QDialog):
         if not time3 > time2 or not time4 > time3: # You can't have a time that is less than the previous time, silly goose.
             self.error_msg.setText('Invalid time settings. Ensure each time is greater than the previous') # ID10T error, but for time.
             self.error_msg.show() # Guilty!
-            return
+            return None
         if unit == "F": # different ranges for F and C
             if not (122 <= temp1 <= 428 and 
                 122 <= temp2 <= 428 and 
                 122 <= temp3 <= 428): # Checks that all temps are within the Solo 3's F range
                 self.error_msg.setText('Please enter valid temperatures (122-428°F)') # ID10T error, but for temp.
                 self.error_msg.show() # Guilty!
-                return
+                return None
         else:
             if not (50 <= temp1 <= 220 and 
                 50 <= temp2 <= 220 and 
                 50 <= temp3 <= 220): # Checks that all temps are within the Solo 3's C range
                 self.error_msg.setText('Please enter valid temperatures (50-220°C)') # ID10T error, but for non-US temp.
                 self.error_msg.show() # Guilty!
-                return
+                return None
         # If we get here, the user didn't mess this up. 
         # but now we gotta convert them all back to strings :D
-        notifchecked = str(self.notifications_checkbox.isChecked())
-        dingChecked = str(self.almighty_ding_checkbox.isChecked())
-        keepActive = str(self.keep_active_default_slider.isChecked())
-        self.settings.setValue('temp1', str(temp1))
-        self.settings.setValue('temp2', str(temp2))
-        self.settings.setValue('temp3', str(temp3))
-        self.settings.setValue('time2', str(time2))
-        self.settings.setValue('time3', str(time3))
-        self.settings.setValue('time4', str(time4))
+        return dict(
+            temp1=str(temp1),
+            temp2=str(temp2),
+            temp3=str(temp3),
+            time2=time2,
+            time3=time3,
+            time4=time4,
+            temp_type=unit,
+        )
+
+    def save_settings(self):
+        """
+        Saves the settings to the store, as long as read_stages() is happy with them.
+
+        :return: None
+        """
+        stages = self.read_stages()
+        if stages is None:
+            return
+        self.store.update(
+            **stages,
+            almightyDing=self.almighty_ding_checkbox.isChecked(), # Save the almighty ding status
+            notifications=self.notifications_checkbox.isChecked(), # Save the notification setting
+            keep_active_default=self.keep_active_default_slider.isChecked(),
+        )
         if not platform == "darwin":
-            self.settings.setValue('timeout', self.notification_timeout.text())
-        self.settings.setValue("almightyDing", dingChecked) # Save the almighty ding status
-        self.settings.setValue("notifications", notifchecked) # Save the notification settin
-        self.settings.setValue("temp_type", unit)
-        self.settings.setValue('keep_active_default', keepActive)
+            self.store.set('timeout', self.notification_timeout.text())
         self.accept() # Save them settings!
+
+    def save_profile(self):
+        """
+        Saves the temps and times as a named profile in the library and makes it the active one.
+        The default three stages are left as they were.
+
+        :return: None
+        """
+        stages = self.read_stages()
+        if stages is None:
+            return
+        name = self.profile_name_input.text().strip()
+        if not name or name == DEFAULT_PROFILE:
+            self.error_msg.setText(f'Give the profile a name (not {DEFAULT_PROFILE})')
+            self.error_msg.show()
+            return
+        try:
+            self.library.save(profile_from_settings(AppSettings(**stages), name))
+        except ValueError:
+            self.error_msg.setText('That profile name is too long')
+            self.error_msg.show()
+            return
+        except OSError:
+            self.error_msg.setText("Couldn't write the profile file")
+            self.error_msg.show()
+            return
+        self.store.update(temp_type=stages['temp_type'], active_profile=name)
+        self.accept()
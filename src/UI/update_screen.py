@@ -7,10 +7,7 @@ from PyQt6.QtWidgets import (
     QHBoxLayout
 )
 from PyQt6.QtCore import QSettings
-from .main_screen import TimerApp
 import webbrowser
-import sys
-import requests
 
 class UpdateApp(QDialog):
 
@@ -55,13 +52,11 @@ class UpdateApp(QDialog):
 
     def run_updater(self):
         webbrowser.open("https://github.com/unquenchedservant/DHV-Session-Timer/releases/latest")
-        self.close()
-        sys.exit()
+        self.close()  # the timer stays up, no need to cut a session short for this
 
 
     def skip_update(self, all=False):
         self.hide()
-        TimerApp().show()
         if all:
             self.settings.setValue(f"skip_{self.update_version}", True)
 
@@ -0,0 +1,53 @@
+"""
+Command line client for a running DHV Session Timer.
+
+    python3 dhvctl.py start|reset|toggle|invert|status
+    python3 dhvctl.py profiles          (lists the saved profiles)
+    python3 dhvctl.py profile NAME      (switches to one)
+    python3 dhvctl.py history           (session counts, average length and abort rate)
+    python3 dhvctl.py ticks             (tick timings, if the timer runs with --profile-ticks)
+    python3 dhvctl.py subscribe    (prints one JSON event per line until the timer goes away)
+"""
+import argparse
+import json
+import sys
+from utilities.command_client import COMMANDS, CommandClient
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dhvctl", description="Drive and query a running DHV Session Timer.")
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("name", nargs="?", help="profile name, for the profile command")
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds to wait for the timer (default 2)")
+    args = parser.parse_args(argv)
+    if args.command == "profile" and not args.name:
+        parser.error("profile needs a NAME")
+    try:
+        client = CommandClient(args.timeout)
+    except OSError as e:
+        print(f"dhvctl: can't reach the timer, is it running? ({e})", file=sys.stderr)
+        return 1
+    with client:
+        reply = client.send(args.command, name=args.name) if args.command == "profile" else client.send(args.command)
+        if reply is None or not reply.get("ok"):
+            print(f"dhvctl: {reply.get('error') if reply else 'no reply'}", file=sys.stderr)
+            return 1
+        if args.command == "profiles":
+            print("\n".join(reply["profiles"]))
+            return 0
+        if args.command in ("history", "ticks"):
+            print(json.dumps(reply[args.command]))
+            return 0
+        if args.command != "subscribe":
+            print(json.dumps(reply["status"]))
+            return 0
+        try:
+            while (event := client.read(timeout=0)) is not None:
+                print(json.dumps(event), flush=True)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,18 +5,243 @@ It was designed with the Arizer Solo 3 in mind, but can be used with most other
 
 Created by Jon Thorne © 2025
 """
+import time
+STARTED_AT = time.perf_counter()  # before the rest of the imports, they're part of startup too
 import sys
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QSettings
-from utilities import resource_path
-from UI.main_screen import TimerApp
-from UI.update_screen import UpdateApp
-import requests
+import argparse
+from utilities.single_instance import InstanceLock
+from utilities.command_client import CommandClient
+from utilities.status_writer import StreamWriter
 
 APP_VERSION = "v1.05"
+FORWARD_COMMANDS = ("start", "reset", "toggle", "invert", "show")  # what a second launch can pass along
+FORWARD_TIMEOUT = 2.0  # seconds, the running timer might still be starting up
 
-if __name__ == '__main__':
-    app = QApplication(sys.argv)    
+def parse_args(argv):
+    """
+    Our own flags and commands. Anything we don't know about is left for Qt.
+
+    :return: (argparse.Namespace, list of leftover args)
+    """
+    parser = argparse.ArgumentParser(prog="DHVSessionTimer", epilog=f"commands: {', '.join(FORWARD_COMMANDS)}")
+    parser.add_argument("--waybar", "--stream", dest="stream", action="store_true",
+                        help="print the timer status as JSON lines on stdout, for waybar's exec with return-type json")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long it took to get the window up, and what got imported on the way, to stderr")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window: the status file, click files, socket, ding and notifications only")
+    parser.add_argument("--profile", metavar="NAME",
+                        help="switch to a saved session profile (passed along to the running timer if there is one)")
+    parser.add_argument("--profile-ticks", action="store_true",
+                        help="time every tick and keep histograms, dumped on SIGUSR1, Ctrl+Shift+P or dhvctl ticks "
+                             "(same as DHV_PROFILE_TICKS=1)")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="write Prometheus metrics to PATH for node_exporter's textfile collector "
+                             "(turns on --profile-ticks for the tick histograms)")
+    parser.add_argument("--metrics-interval", metavar="SECONDS", type=float, default=15.0,
+                        help="how often to rewrite the metrics file (default 15, at least 1)")
+    args, leftover = parser.parse_known_args(argv[1:])
+    # Bare words we know are commands, e.g. "DHVSessionTimer toggle". Qt gets the rest.
+    args.commands = [arg for arg in leftover if arg in FORWARD_COMMANDS]
+    return args, [arg for arg in leftover if arg not in FORWARD_COMMANDS]
+
+def connect_to_running(timeout=FORWARD_TIMEOUT):
+    """
+    Connects to the timer that holds the lock. Keeps trying for a bit, in case it's still getting its socket up.
+
+    :return: CommandClient, or None if it never answered
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return CommandClient(timeout)
+        except OSError:
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(0.05)
+
+def forward(args):
+    """
+    Another timer is already running, hand our commands to it instead of starting a second one.
+    With --waybar we stay on as a thin client and relay its status instead.
+
+    :return: int, exit code
+    """
+    client = connect_to_running()
+    if client is None:
+        print("DHVSessionTimer: another timer is running but not answering", file=sys.stderr)
+        return 1
+    with client:
+        if args.profile:
+            reply = client.send("profile", name=args.profile)
+            if reply is None or not reply.get("ok"):
+                print(f"DHVSessionTimer: profile failed: {reply.get('error') if reply else 'no reply'}", file=sys.stderr)
+                return 1
+        for cmd in args.commands or ([] if args.stream or args.profile else ["show"]):
+            reply = client.send(cmd)
+            if reply is None or not reply.get("ok"):
+                print(f"DHVSessionTimer: {cmd} failed: {reply.get('error') if reply else 'no reply'}", file=sys.stderr)
+                return 1
+        if args.stream:
+            stream = StreamWriter(sys.stdout)
+            reply = client.send("subscribe")
+            while reply is not None and stream.stream is not None:
+                status = reply["status"]
+                stream.write({"text": status["text"], "class": status["class"]})
+                reply = client.read(timeout=0)
+    return 0
+
+HEAVY_MODULES = ("pygame", "plyer", "requests", "concurrent.futures")  # none of these should be needed for the first frame
+
+def report_startup(milestone="first frame"):
+    """
+    Prints the time to first frame (or to ready, headless), memory use so far, and any heavy modules
+    that snuck onto the startup path. For a full per-module breakdown, run with python3 -X importtime main.py
+
+    :return: None
+    """
+    elapsed_ms = (time.perf_counter() - STARTED_AT) * 1000
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"startup: {milestone} after {elapsed_ms:.0f} ms", file=sys.stderr)
+    try:
+        import resource
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on linux, bytes on mac
+        if sys.platform == "darwin":
+            peak_kb //= 1024
+        print(f"startup: peak RSS {peak_kb / 1024:.1f} MB", file=sys.stderr)
+    except ImportError:
+        pass  # windows
+    print(f"startup: heavy modules loaded before {milestone}: {', '.join(loaded) or 'none'}", file=sys.stderr)
+
+def apply_args(timer, args):
+    """
+    Runs the --profile switch and any commands we were launched with.
+
+    :param name: timer: The SessionTimer
+    :return: None
+    """
+    if args.profile:
+        result = timer.switch_profile(args.profile)
+        if "error" in result:
+            print(f"DHVSessionTimer: {result['error']}", file=sys.stderr)
+    for cmd in args.commands:
+        timer.command_server.handlers[cmd]()
+
+def make_profiler(args):
+    """
+    :return: TickProfiler if --profile-ticks, --metrics-file or DHV_PROFILE_TICKS is on, otherwise None
+    """
+    from utilities import tick_profiler
+    if args.profile_ticks or args.metrics_file or tick_profiler.enabled_from_env():
+        return tick_profiler.TickProfiler()
+    return None
+
+def export_metrics(timer, args, profiler):
+    """
+    Starts the metrics file writer, if --metrics-file was given. It stops when the timer closes.
+
+    :param name: timer: The SessionTimer
+    :param name: profiler: The TickProfiler, for the tick histograms
+    :return: None
+    """
+    if not args.metrics_file:
+        return
+    from utilities.metrics_exporter import MetricsExporter
+    MetricsExporter(args.metrics_file, args.metrics_interval, profiler).attach(timer)
+
+def watch_signals(app, handlers):
+    """
+    Runs handlers for signals on the event loop, e.g. SIGTERM quitting it so the settings and history get
+    saved on the way out. Python only runs signal handlers between bytecodes, which never happens while
+    Qt sleeps, so the signal number gets written to a socket Qt is watching instead.
+
+    :param name: handlers: dict of signal number to callable
+    :return: None
+    """
+    import signal
+    import socket
+    from PyQt6.QtCore import QSocketNotifier
+    if not handlers:
+        return
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    writer.setblocking(False)
+    signal.set_wakeup_fd(writer.fileno())
+    for signum in handlers:
+        signal.signal(signum, lambda *args: None)  # the notifier below does the work
+
+    def dispatch():
+        try:
+            signums = reader.recv(64)
+        except BlockingIOError:
+            return
+        for signum in signums:
+            if signum in handlers:
+                handlers[signum]()
+
+    notifier = QSocketNotifier(reader.fileno(), QSocketNotifier.Type.Read, app)
+    notifier.activated.connect(dispatch)
+    app.signal_socket = (reader, writer)  # keep them open as long as the app
+
+def profiler_signals(profiler):
+    """
+    :return: dict for watch_signals, SIGUSR1 dumps the tick profile (not on Windows, it has no SIGUSR1)
+    """
+    import signal
+    if profiler is None or not hasattr(signal, "SIGUSR1"):
+        return {}
+    return {signal.SIGUSR1: profiler.dump}
+
+def run_headless(args, qt_args):
+    """
+    Start the timer without a window, on a QCoreApplication. No widgets, styles or update checks get loaded.
+
+    :return: int, exit code
+    """
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from utilities.session_timer import SessionTimer
+    import signal
+    app = QCoreApplication(sys.argv[:1] + qt_args)
+    profiler = make_profiler(args)
+    watch_signals(app, {signal.SIGINT: app.quit, signal.SIGTERM: app.quit, **profiler_signals(profiler)})
+    status_stream = StreamWriter(sys.stdout) if args.stream else None
+    timer = SessionTimer(status_stream, profiler=profiler)
+    app.aboutToQuit.connect(timer.close)
+    export_metrics(timer, args, profiler)
+    timer.resume()
+    if args.startup_report:
+        QTimer.singleShot(0, lambda: report_startup("ready"))
+    QTimer.singleShot(0, timer.warm_up)
+    apply_args(timer, args)
+    return app.exec()
+
+def show_update_prompt(version_name, settings, parent):
+    """
+    Pops up the update dialog, unless this version was skipped.
+
+    :param name: version_name: The release the checker found
+    :param name: settings: QSettings, for the skipped versions
+    :param name: parent: The timer window, keeps the dialog alive
+    :return: None
+    """
+    if settings.value(f"skip_{version_name}", defaultValue=False, type=bool):
+        return
+    from UI.update_screen import UpdateApp
+    parent.update_prompt = UpdateApp(version_name)
+    parent.update_prompt.show()
+
+def run(args, qt_args):
+    """
+    Start the timer for real: Qt, the window, the works.
+
+    :return: int, exit code
+    """
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QSettings, QTimer
+    from utilities import resource_path
+    from UI.main_screen import TimerApp
+    from utilities.update_check import UpdateChecker
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
     settings = QSettings(
             "UnquenchedServant", "DHV-Session-Timer"
@@ -33,13 +258,25 @@ if __name__ == '__main__':
         resource = "asset\\style.qss"
     with open (resource_path(resource), "r") as f:
         app.setStyleSheet(f.read())
-    response = requests.get("https://api.github.com/repos/unquenchedservant/DHV-Session-Timer/releases/latest")
-    version_name = response.json()["name"]
-    skip_current_update = settings.value(f"skip_{version_name}", defaultValue=False, type=bool)
-    skip_all_updates = settings.value("skip_all_updates", defaultValue=False, type=bool)
-    if version_name != APP_VERSION and not skip_current_update and not skip_all_updates:
-        ex = UpdateApp(version_name)
-    else:
-        ex = TimerApp()
-    ex.show() 
-    sys.exit(app.exec())
\ No newline at end of file
+    profiler = make_profiler(args)
+    watch_signals(app, profiler_signals(profiler))
+    status_stream = StreamWriter(sys.stdout) if args.stream else None
+    ex = TimerApp(status_stream, profiler=profiler)
+    if args.startup_report:
+        QTimer.singleShot(0, report_startup)  # queued before show(), so it runs ahead of the window's warm up
+    ex.show()
+    export_metrics(ex.core, args, profiler)
+    apply_args(ex.core, args)
+    # The timer is up, now see if there's an update. This happens in the background and only shows up if there is one.
+    if not ex.prefs.skip_all_updates:
+        update_checker = UpdateChecker(APP_VERSION, parent=ex)
+        update_checker.update_available.connect(lambda version_name: show_update_prompt(version_name, settings, ex))
+        QTimer.singleShot(0, update_checker.start)
+    return app.exec()
+
+if __name__ == '__main__':
+    args, qt_args = parse_args(sys.argv)
+    instance_lock = InstanceLock()
+    if not instance_lock.acquire():
+        sys.exit(forward(args))  # no Qt needed, we're just a messenger
+    sys.exit(run_headless(args, qt_args) if args.headless else run(args, qt_args))
\ No newline at end of file
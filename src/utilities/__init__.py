@@ -3,6 +3,7 @@ For various utility functions
 """
 import os
 import sys
+import tempfile
 
 def get_ding_resource():
     if sys.platform in ("linux", "linux2", "darwin"):
@@ -18,4 +19,33 @@ def resource_path(relative_path):
     except Exception:
         base_path = os.path.abspath(".")
 
-    return os.path.join(base_path, relative_path)
\ No newline at end of file
+    return os.path.join(base_path, relative_path)
+
+def runtime_path(name):
+    """ Get a per-user path for sockets and other runtime files, $XDG_RUNTIME_DIR when we have one """
+    base_path = os.environ.get("XDG_RUNTIME_DIR")
+    if not base_path or not os.path.isdir(base_path):
+        base_path = tempfile.gettempdir()
+        if hasattr(os, "getuid"):
+            # /tmp is shared between users, so keep ours apart
+            root, ext = os.path.splitext(name)
+            name = f"{root}-{os.getuid()}{ext}"
+    return os.path.join(base_path, name)
+
+
+def data_path(name, cache=False):
+    """ Get a path in the per-user data (or cache) folder for the app, creating the folder if needed """
+    if sys.platform == "win32":
+        base_path = os.environ.get("LOCALAPPDATA" if cache else "APPDATA") or os.path.expanduser("~")
+        base_path = os.path.join(base_path, "DHV-Session-Timer")
+    elif sys.platform == "darwin":
+        base_path = os.path.expanduser("~/Library/Caches" if cache else "~/Library/Application Support")
+        base_path = os.path.join(base_path, "DHV-Session-Timer")
+    else:
+        if cache:
+            base_path = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        else:
+            base_path = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+        base_path = os.path.join(base_path, "dhv-session-timer")
+    os.makedirs(base_path, exist_ok=True)
+    return os.path.join(base_path, name)
@@ -0,0 +1,60 @@
+"""
+Audio for the application. The almighty ding lives here.
+"""
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # pygame's hello banner would end up in the --waybar stream
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")  # SDL would otherwise swallow SIGINT/SIGTERM
+from pygame import mixer
+import pygame
+
+
+class DingPlayer:
+    """
+    Loads the ding once and keeps it decoded in memory, so playing it is just handing a buffer to a channel.
+    """
+
+    def __init__(self, sound_path):
+        """
+        Initialize the mixer, decode the ding into a PCM buffer, and reserve a channel for it.
+
+        :param name: sound_path: Path to the ding sound file
+        :return: None
+        """
+        self.sound_path = sound_path
+        self.sound = None
+        self.channel = None
+        try:
+            if not mixer.get_init():
+                mixer.init()
+            self.sound = mixer.Sound(sound_path)  # decoded once, stays in memory
+            mixer.set_reserved(1)  # keep channel 0 to ourselves so nothing else steals it
+            self.channel = mixer.Channel(0)
+        except pygame.error:
+            # No audio device (headless box, busy sound server, etc.). The timer still works, just quietly.
+            self.sound = None
+            self.channel = None
+
+    @property
+    def available(self):
+        return self.channel is not None
+
+    def play(self):
+        """
+        Plays the ding on the warm channel. Restarts it if it's already playing.
+
+        :return: None
+        """
+        if self.available:
+            self.channel.play(self.sound)
+
+    def stop(self):
+        if self.available:
+            self.channel.stop()
+
+    def set_volume(self, volume):
+        """
+        :param name: volume: 0.0 to 1.0
+        :return: None
+        """
+        if self.available:
+            self.sound.set_volume(volume)
@@ -0,0 +1,128 @@
+"""
+Plays the ding from one long-lived worker thread, so pygame never runs on the GUI thread.
+"""
+import collections
+import threading
+
+MAX_PENDING = 4  # more than this many commands waiting means something's wrong, new ones get dropped
+
+
+def load_ding_player(sound_path):
+    from utilities.audio import DingPlayer  # pygame is slow to import, this keeps it on the worker thread
+    return DingPlayer(sound_path)
+
+
+class AudioWorker:
+    """
+    One thread that owns the DingPlayer, fed through a small queue of commands (play, stop, set_volume).
+    If the queue is full the new command is dropped instead of waiting, a late ding is worse than none.
+    """
+
+    def __init__(self, sound_path, loader=load_ding_player, max_pending=MAX_PENDING):
+        """
+        :param name: sound_path: Path to the ding sound file
+        :param name: loader: Callable(sound_path) run on the worker thread, returns the player
+        :param name: max_pending: How many commands can wait in the queue
+        :return: None
+        """
+        self.sound_path = sound_path
+        self.loader = loader
+        self.max_pending = max_pending
+        self.pending = collections.deque()  # (command, args)
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = None
+        self.player = None
+        self.played = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        """
+        Starts the worker thread, which loads the ding straight away. Safe to call more than once.
+
+        :return: None
+        """
+        with self.condition:
+            if self.thread is None and not self.stopping:
+                self.thread = threading.Thread(target=self.run, name="audio", daemon=True)
+                self.thread.start()
+
+    def play(self):
+        self.submit("play")
+
+    def stop(self):
+        self.submit("stop")
+
+    def set_volume(self, volume):
+        """
+        :param name: volume: 0.0 to 1.0
+        :return: None
+        """
+        self.submit("set_volume", volume)
+
+    def submit(self, command, *args):
+        """
+        Queues a command for the worker. Returns right away.
+
+        :param name: command: The DingPlayer method to call
+        :return: bool, False if it got dropped
+        """
+        self.start()
+        with self.condition:
+            if self.stopping or len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending.append((command, args))
+            self.condition.notify()
+            return True
+
+    def run(self):
+        try:
+            self.player = self.loader(self.sound_path)
+        except Exception:
+            self.player = None  # no ding this time, the timer carries on without it
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                command, args = self.pending.popleft()
+            if self.player is None:
+                continue
+            try:
+                getattr(self.player, command)(*args)
+            except Exception:
+                with self.condition:
+                    self.errors += 1
+                continue
+            if command == "play":
+                with self.condition:
+                    self.played += 1
+
+    def stats(self):
+        """
+        :return: dict of counters
+        """
+        with self.condition:
+            return {
+                "played": self.played,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "pending": len(self.pending),
+                "available": self.player is not None and self.player.available,
+            }
+
+    def close(self, timeout=0.5):
+        """
+        Stops the worker. Anything still queued is dropped.
+
+        :return: None
+        """
+        with self.condition:
+            self.stopping = True
+            self.pending.clear()
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
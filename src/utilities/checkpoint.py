@@ -0,0 +1,133 @@
+"""
+Remembers the running session on disk (session.checkpoint in the app's data folder), so a crash,
+kill or restart mid-session picks up where it was instead of starting over.
+"""
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from utilities import data_path
+from utilities.profile_library import MAX_NAME_BYTES
+
+CHECKPOINT_FILE = "session.checkpoint"
+MAGIC = b"DHVC"
+VERSION = 1
+PROFILE_BYTES = MAX_NAME_BYTES  # the library doesn't take longer names, so nothing gets cut
+# magic, version, active, stage, started (wall clock), started (monotonic clock), profile name, crc32 of the rest
+RECORD = struct.Struct(f"<4sBBHdd{PROFILE_BYTES}sI")
+
+
+@dataclass(frozen=True, slots=True)
+class CheckpointRecord:
+    """
+    An unfinished session.
+
+    profile: name of the profile it was running
+    stage: index of the stage it had got to
+    started_wall: time.time() when it started
+    started_mono: the session clock (CLOCK_BOOTTIME etc) when it started, only means something until a reboot
+    """
+    profile: str
+    stage: int
+    started_wall: float
+    started_mono: float
+
+
+class SessionCheckpoint:
+    """
+    One fixed size record, rewritten in place. It's written (and fsynced) when a session starts and at each
+    stage change, and marked done when the session ends. Elapsed time comes from the start times, so
+    nothing needs writing on a tick.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param name: path: Where the checkpoint lives, session.checkpoint in the data folder by default
+        :return: None
+        """
+        self.path = path or data_path(CHECKPOINT_FILE)
+        self.fd = None
+        self.record = None  # what's on disk, while a session runs
+        self.writes = 0
+        self.syncs = 0
+        self.errors = 0
+
+    def load(self):
+        """
+        Reads back an unfinished session, if there is one.
+
+        :return: CheckpointRecord, or None if there's no session to resume (or the file is junk)
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read(RECORD.size)
+        except OSError:
+            return None
+        if len(data) != RECORD.size:
+            return None
+        magic, version, active, stage, started_wall, started_mono, profile, crc = RECORD.unpack(data)
+        if magic != MAGIC or version != VERSION or crc != zlib.crc32(data[:-4]) or not active:
+            return None
+        profile = profile.rstrip(b"\0").decode(errors="ignore")  # a long name might have been cut mid character
+        self.record = CheckpointRecord(profile, stage, started_wall, started_mono)
+        return self.record
+
+    def begin(self, profile, started_wall, started_mono):
+        """
+        A session just started. Synced to disk before returning.
+
+        :param name: profile: Name of the profile it's running
+        :param name: started_wall: time.time() at the start
+        :param name: started_mono: The session clock at the start
+        :return: None
+        """
+        self.record = CheckpointRecord(profile, 0, started_wall, started_mono)
+        self.write(True, sync=True)
+
+    def set_stage(self, stage):
+        """
+        The session moved on to another stage. Synced to disk before returning.
+
+        :param name: stage: Index of the new stage
+        :return: None
+        """
+        if self.record is None or self.record.stage == stage:
+            return
+        self.record = CheckpointRecord(self.record.profile, stage, self.record.started_wall, self.record.started_mono)
+        self.write(True, sync=True)
+
+    def clear(self):
+        """
+        The session ended (finished or reset). Not synced, it's in the page cache straight away so it survives
+        us crashing, and if a power cut loses it the worst that happens is a reset session comes back.
+
+        :return: None
+        """
+        if self.record is None:
+            return
+        self.write(False, sync=False)
+        self.record = None
+
+    def write(self, active, sync):
+        record = self.record
+        profile = record.profile.encode()[:PROFILE_BYTES]
+        data = RECORD.pack(
+            MAGIC, VERSION, int(active), record.stage, record.started_wall, record.started_mono, profile, 0
+        )[:-4]
+        data += struct.pack("<I", zlib.crc32(data))
+        try:
+            if self.fd is None:
+                self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o600)
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            os.write(self.fd, data)
+            self.writes += 1
+            if sync:
+                os.fsync(self.fd)
+                self.syncs += 1
+        except OSError:
+            self.errors += 1  # no resume for this session, not worth stopping the timer over
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
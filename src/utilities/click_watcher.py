@@ -0,0 +1,65 @@
+"""
+Watches for the waybar click files (~/dhv_timer_click1 and ~/dhv_timer_click2).
+"""
+import os
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+CLICK_FILE = "~/dhv_timer_click1"  # start/reset
+INVERT_FILE = "~/dhv_timer_click2"  # invert time
+FALLBACK_POLL_MS = 100
+
+
+class ClickWatcher(QObject):
+    """
+    Lets the OS tell us when a click file shows up (inotify on linux, kqueue on mac, etc.) instead of
+    checking for the files over and over. If the home directory can't be watched, falls back to polling.
+    """
+    toggle_requested = pyqtSignal()
+    invert_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        """
+        Start watching the home directory for the click files.
+
+        :param name: parent: The QObject that owns the watcher
+        :return: None
+        """
+        super().__init__(parent)
+        self.click_file = os.path.expanduser(CLICK_FILE)
+        self.invert_file = os.path.expanduser(INVERT_FILE)
+        self.poll_timer = None
+        self.watcher = QFileSystemWatcher(self)
+        if self.watcher.addPath(os.path.dirname(self.click_file)):
+            self.watcher.directoryChanged.connect(self.check_files)
+        else:
+            # Can't get directory events here, so do it the old fashioned way.
+            self.poll_timer = QTimer(self)
+            self.poll_timer.timeout.connect(self.check_files)
+            self.poll_timer.start(FALLBACK_POLL_MS)
+        self.check_files()  # in case something was clicked before we were watching
+
+    @property
+    def event_driven(self):
+        return self.poll_timer is None
+
+    def check_files(self, *_):
+        """
+        Checks for both click files, removes whichever exist and emits the matching signal.
+        The watcher wakes us for any change in ~, our own status file writes included, so most calls find nothing.
+
+        :return: None
+        """
+        if self.consume(self.click_file):
+            self.toggle_requested.emit()
+        if self.consume(self.invert_file):
+            self.invert_requested.emit()
+
+    @staticmethod
+    def consume(path):
+        if not os.path.lexists(path):
+            return False  # the usual case, a stat is cheaper than a failed remove
+        try:
+            os.remove(path)
+        except OSError:  # gone since, or not ours to remove
+            return False
+        return True
@@ -0,0 +1,123 @@
+"""
+Clocks the timer can run on. SystemClock is the real thing, VirtualClock only moves when told to,
+which lets a whole session run in a few milliseconds.
+"""
+import heapq
+import itertools
+from PyQt6.QtCore import QTimer, Qt
+from utilities.scheduler import monotonic_time
+
+
+class SystemClock:
+    """
+    Real time, with real QTimers.
+    """
+
+    def now(self):
+        return monotonic_time()
+
+    def timer(self, parent, callback):
+        """
+        Makes a single shot timer that calls callback when it goes off.
+
+        :param name: parent: The QObject that owns the timer
+        :param name: callback: What to call on timeout
+        :return: QTimer
+        """
+        timer = QTimer(parent)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.timeout.connect(callback)
+        return timer
+
+
+class VirtualTimer:
+    """
+    Stand in for a single shot QTimer that runs on a VirtualClock. Same start/stop/isActive calls.
+    """
+
+    def __init__(self, clock, callback):
+        self.clock = clock
+        self.callback = callback
+        self.deadline = None
+        self.generation = 0  # bumped on every start/stop so old heap entries are ignored
+
+    def start(self, msec):
+        self.generation += 1
+        self.deadline = self.clock.now() + msec / 1000
+        self.clock.schedule(self)
+
+    def stop(self):
+        self.generation += 1
+        self.deadline = None
+
+    def isActive(self):
+        return self.deadline is not None
+
+
+class VirtualClock:
+    """
+    A clock that stands still until advance() or run() moves it, firing any timers it passes on the way.
+    """
+
+    def __init__(self, start=0.0):
+        self.time = start
+        self.queue = []  # (deadline, order, generation, timer)
+        self.order = itertools.count()
+
+    def now(self):
+        return self.time
+
+    def timer(self, parent, callback):
+        return VirtualTimer(self, callback)
+
+    def schedule(self, timer):
+        heapq.heappush(self.queue, (timer.deadline, next(self.order), timer.generation, timer))
+
+    def pop_next(self, until=None):
+        """
+        Pops the next live timer, if it's due by until.
+
+        :return: VirtualTimer or None
+        """
+        while self.queue:
+            deadline, _, generation, timer = self.queue[0]
+            if generation != timer.generation:
+                heapq.heappop(self.queue)  # restarted or stopped since this was queued
+                continue
+            if until is not None and deadline > until:
+                return None
+            heapq.heappop(self.queue)
+            return timer
+        return None
+
+    def fire(self, timer):
+        self.time = max(self.time, timer.deadline)
+        timer.deadline = None
+        timer.callback()
+
+    def advance(self, seconds):
+        """
+        Moves time forward by seconds, firing every timer due along the way, in order.
+
+        :return: int, number of timers fired
+        """
+        until = self.time + seconds
+        fired = 0
+        while (timer := self.pop_next(until)) is not None:
+            self.fire(timer)
+            fired += 1
+        self.time = until
+        return fired
+
+    def run(self, limit=1000000):
+        """
+        Keeps jumping to the next timer until there are none left (or limit timers have fired).
+
+        :return: int, number of timers fired
+        """
+        fired = 0
+        while fired < limit and (timer := self.pop_next()) is not None:
+            self.fire(timer)
+            fired += 1
+        return fired
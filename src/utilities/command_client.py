@@ -0,0 +1,115 @@
+"""
+Client side of the command socket. Kept free of Qt on linux/mac so it's cheap to import.
+"""
+import json
+import socket
+import sys
+from utilities import runtime_path
+
+SOCKET_NAME = "dhv_timer.sock"
+COMMANDS = ("start", "reset", "toggle", "invert", "show", "status", "subscribe", "profiles", "profile", "history", "ticks")
+
+
+def socket_name():
+    """
+    Where the running timer listens. A named pipe on windows, a unix socket everywhere else.
+
+    :return: str
+    """
+    if sys.platform == "win32":
+        return "dhv_timer"
+    return runtime_path(SOCKET_NAME)
+
+
+class CommandClient:
+    """
+    Talks line-delimited JSON to the running timer.
+    """
+
+    def __init__(self, timeout=2.0):
+        """
+        Connect to the running timer.
+
+        :param name: timeout: Seconds to wait on connect and each reply
+        :return: None
+        :raises OSError: if no timer is listening
+        """
+        self.timeout = timeout
+        if hasattr(socket, "AF_UNIX") and sys.platform != "win32":
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            try:
+                self.sock.connect(socket_name())
+            except OSError:
+                self.sock.close()
+                raise
+            self.reader = self.sock.makefile("rb")
+            self.qt_socket = None
+        else:
+            from PyQt6.QtNetwork import QLocalSocket  # windows only, named pipes need Qt
+            self.sock = None
+            self.reader = None
+            self.qt_socket = QLocalSocket()
+            self.qt_socket.connectToServer(socket_name())
+            if not self.qt_socket.waitForConnected(int(timeout * 1000)):
+                raise ConnectionRefusedError(self.qt_socket.errorString())
+
+    def send(self, cmd, **kwargs):
+        """
+        Sends a command and waits for the reply.
+
+        :param name: cmd: One of COMMANDS
+        :return: dict, the decoded reply
+        """
+        message = dict(kwargs, cmd=cmd)
+        data = (json.dumps(message) + "\n").encode()
+        if self.sock is not None:
+            self.sock.sendall(data)
+        else:
+            self.qt_socket.write(data)
+            self.qt_socket.waitForBytesWritten(int(self.timeout * 1000))
+        return self.read()
+
+    def read(self, timeout=None):
+        """
+        Reads one message from the timer. Blocks for up to timeout seconds, forever if timeout is 0.
+
+        :return: dict, or None once the timer hangs up
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self.sock is not None:
+            self.sock.settimeout(timeout or None)
+            line = self.reader.readline()
+        else:
+            while not self.qt_socket.canReadLine():
+                if not self.qt_socket.waitForReadyRead(int(timeout * 1000) if timeout else -1):
+                    return None
+            line = bytes(self.qt_socket.readLine())
+        if not line:
+            return None
+        return json.loads(line)
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+        else:
+            self.qt_socket.disconnectFromServer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_command(cmd, timeout=2.0, **kwargs):
+    """
+    One round trip: connect, send a command, return the reply.
+
+    :param name: cmd: One of COMMANDS
+    :return: dict, the decoded reply
+    :raises OSError: if no timer is listening
+    """
+    with CommandClient(timeout) as client:
+        return client.send(cmd, **kwargs)
@@ -0,0 +1,144 @@
+"""
+Local command socket for the timer. Status bars and scripts can drive and query the timer over it.
+
+Protocol: one JSON object per line each way. Send {"cmd": "start"} (or reset, toggle, invert, show, status, subscribe,
+profiles, history, ticks (with --profile-ticks), or {"cmd": "profile", "name": ...}), get back {"ok": true, "status": {...}}.
+After subscribe, the socket also gets {"event": "tick"|"stage"|"state", ...} lines pushed to it until it disconnects.
+"""
+import json
+from PyQt6.QtCore import QObject
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from utilities.command_client import socket_name
+
+MAX_LINE = 4096  # nobody needs to send us more than this
+
+
+class CommandServer(QObject):
+    """
+    Listens on the command socket and hands commands to the timer.
+    """
+
+    def __init__(self, handlers, status, parent=None):
+        """
+        Start listening.
+
+        :param name: handlers: Maps command names to callables. Any other keys in the message are passed as keyword
+            arguments, and if the callable returns a dict it gets merged into the reply
+        :param name: status: Callable returning the current status dict
+        :param name: parent: The QObject that owns the server
+        :return: None
+        """
+        super().__init__(parent)
+        self.handlers = handlers
+        self.status = status
+        self.subscribers = []
+        self.clients = []  # every socket still connected, so close() can shut them down
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.handle_connection)
+        self.listening = self.listen(socket_name())
+
+    def listen(self, name):
+        """
+        Listens on name, clearing out a stale socket left behind by a crashed timer.
+
+        :return: bool, whether we're listening
+        """
+        if self.server.listen(name):
+            return True
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(100):  # somebody is home, leave their socket alone
+            probe.disconnectFromServer()
+            return False
+        QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def close(self):
+        """
+        Stops listening and hangs up on everyone. Their signals get disconnected first, otherwise Qt tearing
+        the sockets down later calls back into a server that's half gone and takes the process with it.
+
+        :return: None
+        """
+        self.server.close()
+        for sock in self.clients:
+            sock.readyRead.disconnect()
+            sock.disconnected.disconnect()
+            sock.abort()
+            sock.deleteLater()
+        self.clients.clear()
+        self.subscribers.clear()
+
+    def handle_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self.clients.append(sock)
+            sock.readyRead.connect(lambda sock=sock: self.handle_ready_read(sock))
+            sock.disconnected.connect(lambda sock=sock: self.handle_disconnect(sock))
+
+    def handle_disconnect(self, sock):
+        if sock in self.subscribers:
+            self.subscribers.remove(sock)
+        if sock in self.clients:
+            self.clients.remove(sock)
+        sock.deleteLater()
+
+    def handle_ready_read(self, sock):
+        while sock.canReadLine():
+            line = bytes(sock.readLine()).strip()
+            if line:
+                self.send(sock, self.handle_line(sock, line))
+        if sock.bytesAvailable() > MAX_LINE:
+            sock.abort()
+
+    def handle_line(self, sock, line):
+        """
+        Runs one command line and builds the reply.
+
+        :param name: sock: The socket it came in on, needed for subscribe
+        :param name: line: The raw bytes of the line
+        :return: dict
+        """
+        try:
+            message = json.loads(line)
+            cmd = message.pop("cmd")
+            if not isinstance(cmd, str):
+                raise TypeError(cmd)
+        except (ValueError, AttributeError, KeyError, TypeError):
+            return {"ok": False, "error": "expected a JSON object with a cmd per line"}
+        result = None
+        if cmd == "subscribe":
+            if sock not in self.subscribers:
+                self.subscribers.append(sock)
+        elif cmd in self.handlers:
+            try:
+                result = self.handlers[cmd](**message)
+            except TypeError:
+                return {"ok": False, "error": f"bad arguments for {cmd}"}
+            except Exception as e:  # anything escaping a Qt slot takes the whole timer down with it
+                return {"ok": False, "error": f"{cmd} failed: {e}"}
+        elif cmd != "status":
+            return {"ok": False, "error": f"unknown command: {cmd}"}
+        reply = {"ok": True, "status": self.status()}
+        if isinstance(result, dict):
+            reply.update(result)
+        return reply
+
+    def publish(self, event, **data):
+        """
+        Pushes an event to everyone who subscribed.
+
+        :param name: event: The event name (tick, stage, state)
+        :return: None
+        """
+        if not self.subscribers:
+            return
+        message = dict(data, event=event)
+        for sock in list(self.subscribers):
+            self.send(sock, message)
+
+    @staticmethod
+    def send(sock, message):
+        sock.write((json.dumps(message) + "\n").encode())
+        sock.flush()
@@ -0,0 +1,182 @@
+"""
+Session history, kept in a SQLite file (history.sqlite3 in the app's data folder).
+"""
+import sqlite3
+import threading
+import time
+from utilities import data_path
+
+HISTORY_FILE = "history.sqlite3"
+BATCH_DELAY = 2.0  # seconds the writer waits to pick up more sessions before committing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    duration REAL NOT NULL,
+    stages_reached INTEGER NOT NULL,
+    stage_count INTEGER NOT NULL,
+    aborted INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL,
+    aborted INTEGER NOT NULL,
+    total_duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    sessions INTEGER NOT NULL,
+    aborted INTEGER NOT NULL,
+    total_duration REAL NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0, 0.0);
+"""
+
+INSERT_SESSION = """
+INSERT INTO sessions (started_at, day, profile, duration, stages_reached, stage_count, aborted)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+UPDATE_DAILY = """
+INSERT INTO daily VALUES (?, 1, ?, ?)
+ON CONFLICT(day) DO UPDATE SET
+    sessions = sessions + 1, aborted = aborted + excluded.aborted, total_duration = total_duration + excluded.total_duration
+"""
+UPDATE_TOTALS = "UPDATE totals SET sessions = sessions + 1, aborted = aborted + ?, total_duration = total_duration + ? WHERE id = 0"
+
+
+class SessionHistory:
+    """
+    Appends finished and aborted sessions to the history file from its own thread, a batch per transaction.
+    The per day and all time aggregates are kept up to date as sessions go in, so the queries below
+    only ever read a handful of rows no matter how many years of sessions there are.
+    """
+
+    def __init__(self, path=None, batch_delay=BATCH_DELAY):
+        """
+        Opens (or creates) the history file and starts the writer thread.
+
+        :param name: path: Where the history lives, history.sqlite3 in the data folder by default
+        :param name: batch_delay: Seconds to wait for more sessions before committing a batch
+        :return: None
+        """
+        self.path = path or data_path(HISTORY_FILE)
+        self.batch_delay = batch_delay
+        self.pending = []  # rows for INSERT_SESSION
+        self.stopping = False
+        self.condition = threading.Condition()
+        self.errors = 0
+        self.reader = None  # opened on the first query, on whichever thread asks
+        with self.connect() as db:
+            db.executescript(SCHEMA)
+        db.close()
+        self.thread = threading.Thread(target=self.run, name="history-writer", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")  # queries don't wait on the writer
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def record(self, started_at, profile, duration, stages_reached, stage_count, aborted):
+        """
+        Queues a session to be written. Returns right away.
+
+        :param name: started_at: Unix time the session started
+        :param name: profile: Name of the profile it ran
+        :param name: duration: How long it ran, in seconds
+        :param name: stages_reached: How many stages it got into
+        :param name: stage_count: How many stages the profile has
+        :param name: aborted: True if it was reset before the end
+        :return: None
+        """
+        day = time.strftime("%Y-%m-%d", time.localtime(started_at))
+        with self.condition:
+            self.pending.append((started_at, day, profile, float(duration), stages_reached, stage_count, int(aborted)))
+            self.condition.notify()
+
+    def run(self):
+        db = self.connect()
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if self.pending and not self.stopping:
+                    self.condition.wait(self.batch_delay)  # give a few more sessions the chance to come along
+                batch, self.pending = self.pending, []
+                stopping = self.stopping
+            if batch:
+                try:
+                    self.write_batch(db, batch)
+                except sqlite3.Error:
+                    with self.condition:
+                        self.errors += 1
+            if stopping:
+                db.close()
+                return
+
+    @staticmethod
+    def write_batch(db, batch):
+        """
+        Inserts a batch of sessions and folds them into the aggregates, all in one transaction.
+
+        :return: None
+        """
+        with db:
+            db.executemany(INSERT_SESSION, batch)
+            db.executemany(UPDATE_DAILY, [(row[1], row[6], row[3]) for row in batch])
+            db.executemany(UPDATE_TOTALS, [(row[6], row[3]) for row in batch])
+
+    def query(self, sql, params=()):
+        if self.reader is None:
+            self.reader = self.connect()
+        return self.reader.execute(sql, params).fetchall()
+
+    def sessions_per_day(self, days=7):
+        """
+        Session counts for the last few days that had any, newest first.
+
+        :return: list of (day, sessions)
+        """
+        return self.query("SELECT day, sessions FROM daily ORDER BY day DESC LIMIT ?", (days,))
+
+    def sessions_per_week(self, weeks=4):
+        """
+        Session counts per week (year-week, weeks start on monday), newest first.
+
+        :return: list of (week, sessions)
+        """
+        return self.query(
+            "SELECT strftime('%Y-%W', day) AS week, SUM(sessions) FROM daily GROUP BY week ORDER BY week DESC LIMIT ?",
+            (weeks,),
+        )
+
+    def summary(self):
+        """
+        All time numbers: session count, average length in seconds, and the share of sessions that were reset early.
+
+        :return: dict
+        """
+        sessions, aborted, total_duration = self.query("SELECT sessions, aborted, total_duration FROM totals")[0]
+        return {
+            "sessions": sessions,
+            "average_length": total_duration / sessions if sessions else 0.0,
+            "abort_rate": aborted / sessions if sessions else 0.0,
+        }
+
+    def close(self, timeout=2.0):
+        """
+        Writes whatever is still queued and stops the writer.
+
+        :return: None
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.thread.join(timeout)
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
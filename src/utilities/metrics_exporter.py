@@ -0,0 +1,283 @@
+"""
+Writes the timer's metrics to a text file every so often, for node_exporter's textfile collector
+(--collector.textfile.directory), so a bunch of machines running the timer can be watched from one Prometheus.
+Turn it on with --metrics-file /var/lib/node_exporter/textfile/dhv_timer.prom
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from utilities.tick_profiler import BUCKET_BOUNDS
+
+DEFAULT_INTERVAL = 15.0  # seconds between writes, scrapes are usually 15s or more apart anyway
+MIN_INTERVAL = 1.0
+# tick profiler histogram name -> (metric name, help)
+TICK_HISTOGRAMS = (
+    ("update_timer", "dhv_tick_duration_seconds", "Time spent handling one tick"),
+    ("tick_lateness", "dhv_tick_lateness_seconds", "How far past its whole second a tick fired"),
+    ("tick_interval", "dhv_tick_interval_seconds", "Time between ticks"),
+)
+
+
+def process_memory():
+    """
+    :return: (resident bytes, thread count), either can be None where we can't tell
+    """
+    rss = threads = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+                    break
+    except (OSError, ValueError):
+        pass  # not linux
+    if rss is None:
+        try:
+            import resource
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # only the peak here. KB on bsd, bytes on mac
+            if sys.platform != "darwin":
+                rss *= 1024
+        except ImportError:
+            pass  # windows
+    if threads is None:
+        threads = threading.active_count()  # python threads only, Qt's own aren't counted
+    return rss, threads
+
+
+class MetricsText:
+    """
+    Builds the Prometheus text format, one metric family at a time.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name, value, labels=None):
+        if value is None:
+            return
+        label_text = ""
+        if labels:
+            label_text = "{" + ",".join(f'{key}="{value_}"' for key, value_ in labels.items()) + "}"
+        self.lines.append(f"{name}{label_text} {float(value)!r}")
+
+    def metric(self, name, kind, help_text, value, labels=None):
+        if value is None:
+            return
+        self.family(name, kind, help_text)
+        self.sample(name, value, labels)
+
+    def histogram(self, name, help_text, histogram):
+        """
+        :param name: histogram: A tick_profiler Histogram
+        :return: None
+        """
+        counts = list(histogram.counts)  # copied in one go, the GUI thread keeps adding to it
+        self.family(name, "histogram", help_text)
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, counts):
+            seen += count
+            self.sample(f"{name}_bucket", seen, {"le": repr(bound)})
+        seen += counts[-1]
+        self.sample(f"{name}_bucket", seen, {"le": "+Inf"})
+        self.sample(f"{name}_sum", histogram.total)
+        self.sample(f"{name}_count", seen)
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Keeps the session counters (fed by SessionTimer's start, stage and stop hooks) and writes them, along with
+    the worker stats, tick histograms and process memory, from its own thread every interval. The hooks only
+    bump numbers under a lock, so the GUI thread never waits on the disk.
+    """
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL, profiler=None):
+        """
+        :param name: path: The file to write, should end in .prom for node_exporter to pick it up
+        :param name: interval: Seconds between writes, at least MIN_INTERVAL
+        :param name: profiler: TickProfiler for the tick histograms, none are written without it
+        :return: None
+        """
+        self.path = os.path.expanduser(path)
+        self.interval = max(MIN_INTERVAL, interval)
+        self.profiler = profiler
+        self.timer = None
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = None
+        self.started = 0
+        self.finished = 0
+        self.aborted = 0
+        self.running = False
+        self.stage = 0
+        self.scheduler = None  # the running session's SessionScheduler, elapsed comes off its clock
+        self.writes = 0
+        self.errors = 0
+        self.last_duration = 0.0
+
+    def attach(self, timer):
+        """
+        Hooks onto a SessionTimer and starts writing. Picks up a session it already resumed.
+
+        :param name: timer: The SessionTimer
+        :return: None
+        """
+        self.timer = timer
+        timer.metrics = self
+        if timer.started:
+            self.session_started()
+            self.stage_entered(timer.session.stage_at(timer.elapsed_time) + 1)
+        self.thread = threading.Thread(target=self.run, name="metrics", daemon=True)
+        self.thread.start()
+
+    def session_started(self):
+        """
+        Called once the timer's scheduler is set up, a resumed session's scheduler already counts from where it was.
+
+        :return: None
+        """
+        with self.condition:
+            self.started += 1
+            self.running = True
+            self.stage = 1
+            # elapsed comes off its clock, time.monotonic() stops counting while a linux machine is suspended
+            self.scheduler = self.timer.scheduler if self.timer is not None else None
+
+    def stage_entered(self, stage):
+        """
+        :param name: stage: 1 based stage number
+        :return: None
+        """
+        with self.condition:
+            self.stage = stage
+
+    def session_ended(self, finished):
+        """
+        :param name: finished: False if it got reset before the end
+        :return: None
+        """
+        with self.condition:
+            if finished:
+                self.finished += 1
+            else:
+                self.aborted += 1
+            self.running = False
+            self.stage = 0
+            self.scheduler = None
+
+    def run(self):
+        while True:
+            self.write()
+            with self.condition:
+                if not self.stopping:
+                    self.condition.wait(self.interval)
+                if self.stopping:
+                    break
+        self.write()  # the last one, with the timer shown as stopped
+
+    def render(self):
+        """
+        :return: str, the whole metrics file
+        """
+        with self.condition:
+            started, finished, aborted = self.started, self.finished, self.aborted
+            running, stage, scheduler = self.running, self.stage, self.scheduler
+            writes, errors, last_duration = self.writes, self.errors, self.last_duration
+        out = MetricsText()
+        out.metric("dhv_sessions_started_total", "counter", "Sessions started (or resumed) since launch", started)
+        out.metric("dhv_sessions_finished_total", "counter", "Sessions that ran to the end since launch", finished)
+        out.metric("dhv_sessions_aborted_total", "counter", "Sessions reset before the end since launch", aborted)
+        out.metric("dhv_session_running", "gauge", "1 while a session is running", int(running))
+        out.metric("dhv_session_stage", "gauge", "Stage the running session is on, 0 when idle", stage)
+        elapsed = scheduler.elapsed_exact() if scheduler is not None else 0
+        out.metric("dhv_session_elapsed_seconds", "gauge", "How far into the running session we are", elapsed)
+
+        if self.timer is not None:
+            status = self.timer.status_writer.stats()
+            out.metric("dhv_status_writes_total", "counter", "Status file writes", status["writes"])
+            out.metric("dhv_status_write_errors_total", "counter", "Status file writes that failed", status["errors"])
+            out.family("dhv_status_write_latency_seconds", "gauge", "Time from queueing a status update to it being on disk")
+            for stat in ("last", "avg", "max"):
+                out.sample("dhv_status_write_latency_seconds", status[f"{stat}_latency"], {"stat": stat})
+
+            notes = self.timer.notifier.stats()
+            out.metric("dhv_notifications_total", "counter", "Notifications shown", notes["dispatched"])
+            out.metric("dhv_notifications_dropped_total", "counter", "Notifications dropped, replaced or timed out",
+                       notes["dropped"] + notes["timed_out"])
+            out.family("dhv_notification_latency_seconds", "gauge", "Time from a stage change to the notification going out")
+            for stat in ("last", "avg", "max"):
+                out.sample("dhv_notification_latency_seconds", notes[f"{stat}_latency"], {"stat": stat})
+
+            audio = self.timer.audio.stats()
+            out.metric("dhv_dings_total", "counter", "Dings played", audio["played"])
+            out.metric("dhv_dings_dropped_total", "counter", "Dings dropped because the audio queue was full", audio["dropped"])
+
+        if self.profiler is not None:
+            for source, name, help_text in TICK_HISTOGRAMS:
+                histogram = self.profiler.histograms.get(source)
+                if histogram is not None:
+                    out.histogram(name, help_text, histogram)
+
+        rss, threads = process_memory()
+        out.metric("process_resident_memory_bytes", "gauge", "Resident memory size in bytes", rss)
+        out.metric("process_threads", "gauge", "Threads in the timer process", threads)
+        out.metric("dhv_metrics_writes_total", "counter", "Times this file has been written", writes)
+        out.metric("dhv_metrics_write_errors_total", "counter", "Times writing this file failed", errors)
+        out.metric("dhv_metrics_write_duration_seconds", "gauge", "How long the last write of this file took", last_duration)
+        return out.text()
+
+    def write(self):
+        """
+        Renders and swaps in a new file with a rename, so the collector never reads half of one.
+
+        :return: None
+        """
+        started = time.perf_counter()
+        directory, name = os.path.split(self.path)
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory or ".")  # dot files get skipped by the collector
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(self.render())
+                os.chmod(tmp_path, 0o644)  # mkstemp makes it 0600, the collector usually runs as someone else
+                os.replace(tmp_path, self.path)
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            with self.condition:
+                self.errors += 1
+            return
+        with self.condition:
+            self.writes += 1
+            self.last_duration = time.perf_counter() - started
+
+    def close(self, timeout=1.0):
+        """
+        Stops the writer, which makes one last write on its way out so the file shows the timer as stopped.
+        A running session isn't counted as ended, it gets resumed next launch.
+
+        :param name: timeout: How long to wait for the writer, a stuck disk gets left to it
+        :return: None
+        """
+        with self.condition:
+            self.stopping = True
+            self.running = False
+            self.stage = 0
+            self.scheduler = None
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
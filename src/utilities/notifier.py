@@ -0,0 +1,171 @@
+"""
+Sends desktop notifications from a worker thread, so a slow notification daemon can't freeze the timer.
+"""
+import collections
+import threading
+import time
+
+APP_NAME = "DHVSessionTimer"
+CALL_TIMEOUT = 5.0  # seconds we give the notification backend before giving up on it
+MAX_PENDING = 4
+
+
+def plyer_backend(title, message, timeout):
+    """
+    The real thing, through plyer (or our own notification.py on mac).
+
+    :param name: timeout: How long the notification stays up, in ms
+    :return: None
+    """
+    from plyer import notification
+    notification.notify(title=f"{title}", message=f"{message}", timeout=timeout, app_name=APP_NAME)
+
+
+def load_plyer_backend():
+    from plyer import notification
+    notification.notify  # touching it makes plyer load the backend for this platform
+
+
+class NotificationDispatcher:
+    """
+    A small queue in front of the notification backend, with one worker thread behind it.
+    A new notification with the same key replaces one that hasn't gone out yet, so a stage 2 alert
+    still stuck in the queue when stage 3 comes along is dropped rather than shown late.
+    """
+
+    def __init__(self, backend=plyer_backend, preload=load_plyer_backend, call_timeout=CALL_TIMEOUT, max_pending=MAX_PENDING):
+        """
+        :param name: backend: Callable(title, message, timeout) that shows the notification
+        :param name: preload: Callable run once on the worker thread before anything else, to get the backend loaded
+        :param name: call_timeout: Seconds to wait on the backend before giving up on a notification
+        :param name: max_pending: How many notifications can wait in the queue, oldest get dropped past that
+        :return: None
+        """
+        self.backend = backend
+        self.preload = preload
+        self.call_timeout = call_timeout
+        self.max_pending = max_pending
+        self.pending = collections.deque()  # (key, title, message, timeout, queued at)
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = None
+        self.stuck_call = None  # a backend call that blew its timeout and hasn't come back yet
+        self.dispatched = 0
+        self.dropped = 0
+        self.timed_out = 0
+        self.errors = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def start(self):
+        """
+        Starts the worker thread, which loads the backend straight away. Safe to call more than once.
+
+        :return: None
+        """
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="notifications", daemon=True)
+                self.thread.start()
+
+    def notify(self, title, message, timeout=10000, key="session"):
+        """
+        Queues a notification. Returns right away.
+
+        :param name: timeout: How long the notification stays up, in ms
+        :param name: key: A queued notification with the same key gets replaced by this one
+        :return: None
+        """
+        self.start()
+        with self.condition:
+            for item in list(self.pending):
+                if item[0] == key:
+                    self.pending.remove(item)
+                    self.dropped += 1
+            while len(self.pending) >= self.max_pending:
+                self.pending.popleft()
+                self.dropped += 1
+            self.pending.append((key, title, message, timeout, time.perf_counter()))
+            self.condition.notify()
+
+    def run(self):
+        if self.preload is not None:
+            try:
+                self.preload()
+            except Exception:
+                pass  # we'll find out for real on the first notification
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                _, title, message, timeout, queued_at = self.pending.popleft()
+            self.dispatch(title, message, timeout, queued_at)
+
+    def dispatch(self, title, message, timeout, queued_at):
+        """
+        Calls the backend on a helper thread and waits up to call_timeout for it.
+        If an earlier call is still stuck, this one is dropped rather than piling up threads.
+
+        :return: None
+        """
+        if self.stuck_call is not None and self.stuck_call.is_alive():
+            with self.condition:
+                self.dropped += 1
+            return
+        self.stuck_call = None
+        errors = []
+
+        def call():
+            try:
+                self.backend(title, message, timeout)
+            except Exception as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=call, name="notification-call", daemon=True)
+        worker.start()
+        worker.join(self.call_timeout)
+        latency = time.perf_counter() - queued_at
+        with self.condition:
+            if worker.is_alive():
+                self.stuck_call = worker
+                self.timed_out += 1
+            elif errors:
+                self.errors += 1
+            else:
+                self.dispatched += 1
+                self.last_latency = latency
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def stats(self):
+        """
+        Dispatch counters, latencies in seconds from notify() to the backend returning.
+
+        :return: dict
+        """
+        with self.condition:
+            return {
+                "dispatched": self.dispatched,
+                "dropped": self.dropped,
+                "timed_out": self.timed_out,
+                "errors": self.errors,
+                "pending": len(self.pending),
+                "last_latency": self.last_latency,
+                "max_latency": self.max_latency,
+                "avg_latency": self.total_latency / self.dispatched if self.dispatched else 0.0,
+            }
+
+    def close(self, timeout=0.5):
+        """
+        Stops the worker. Anything still queued is dropped, the session is over anyway.
+
+        :return: None
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
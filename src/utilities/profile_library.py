@@ -0,0 +1,117 @@
+"""
+Named session profiles, all kept in one JSON file (profiles.json in the app's data folder).
+"""
+import json
+import os
+from utilities import data_path
+from utilities.profiles import SessionProfile
+
+LIBRARY_FILE = "profiles.json"
+DEFAULT_PROFILE = "Default"  # the three stages from the settings window, never stored in the file
+MAX_NAME_BYTES = 64  # UTF-8, so the name fits whole in the session checkpoint
+
+
+class ProfileLibrary:
+    """
+    Loads the profile file once and keeps it indexed by name. Profiles are only parsed when they're
+    first used, so a library with thousands of them still loads fast, and switching is a dict lookup.
+
+    File format: {"version": 1, "profiles": [{"name": ..., "stages": [{"temp", "duration", "alert"}, ...]}, ...]}
+    """
+
+    def __init__(self, path=None):
+        """
+        :param name: path: Where the library lives, profiles.json in the data folder by default
+        :return: None
+        """
+        self.path = path or data_path(LIBRARY_FILE)
+        self.raw = {}  # name -> dict straight from the file
+        self.parsed = {}  # name -> SessionProfile, filled in as they get used
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            return  # broken file, start empty rather than not start at all
+        profiles = data.get("profiles", []) if isinstance(data, dict) else []
+        self.raw = {
+            entry["name"]: entry for entry in profiles
+            if isinstance(entry, dict) and entry.get("name") and entry["name"] != DEFAULT_PROFILE
+        }
+        self.parsed = {}
+
+    def names(self):
+        """
+        Every profile name, Default first, then the rest in the order they were saved.
+
+        :return: list of str
+        """
+        return [DEFAULT_PROFILE] + list(self.raw)
+
+    def __contains__(self, name):
+        return name == DEFAULT_PROFILE or name in self.raw
+
+    def __len__(self):
+        return len(self.raw) + 1
+
+    def resolve(self, name):
+        """
+        Finds a profile by name, or by the first MAX_NAME_BYTES of its name. Profiles saved before there was
+        a length limit only ever made it into the checkpoint cut short.
+
+        :return: str, the full name, or None if there's no such profile
+        """
+        if name in self:
+            return name
+        for full_name in self.raw:
+            if full_name.encode()[:MAX_NAME_BYTES].decode(errors="ignore") == name:
+                return full_name
+        return None
+
+    def get(self, name):
+        """
+        Looks up a stored profile. Default isn't stored, build that one with profile_from_settings.
+
+        :return: SessionProfile, or None if there's no such profile or it's broken
+        """
+        profile = self.parsed.get(name)
+        if profile is None and name in self.raw:
+            try:
+                profile = SessionProfile.from_dict(self.raw[name])
+            except ValueError:
+                return None
+            self.parsed[name] = profile
+        return profile
+
+    def save(self, profile):
+        """
+        Adds a profile, or replaces the one with the same name, and writes the file.
+
+        :param name: profile: The SessionProfile to store
+        :return: None
+        :raises ValueError: if it's named after the Default profile, or the name is over MAX_NAME_BYTES
+        :raises OSError: if the file can't be written
+        """
+        if profile.name == DEFAULT_PROFILE:
+            raise ValueError(f"{DEFAULT_PROFILE} comes from the settings, it can't be saved as a profile")
+        if len(profile.name.encode()) > MAX_NAME_BYTES:
+            raise ValueError(f"profile names can be up to {MAX_NAME_BYTES} bytes")
+        self.raw[profile.name] = profile.to_dict()
+        self.parsed[profile.name] = profile
+        self.write()
+
+    def remove(self, name):
+        if self.raw.pop(name, None) is not None:
+            self.parsed.pop(name, None)
+            self.write()
+
+    def write(self):
+        data = {"version": 1, "profiles": list(self.raw.values())}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
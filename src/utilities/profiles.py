@@ -0,0 +1,151 @@
+"""
+Session profiles: any number of stages, each with its own temperature, length and alert.
+"""
+import bisect
+import json
+from dataclasses import dataclass, asdict
+
+STAGE_CLASSES = ("green", "yellow", "red")  # first stage, middle stages, last stage
+DONE_CLASS = "white"
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """
+    One step of a session.
+
+    temp: what to set the device to, in the app's temperature unit
+    duration: how long the stage lasts, in minutes
+    alert: whether to ding/notify when this stage starts
+    """
+    temp: str
+    duration: int
+    alert: bool = True
+
+
+@dataclass(frozen=True)
+class SessionProfile:
+    """
+    A named list of stages, run one after the other.
+    """
+    name: str
+    stages: tuple
+
+    def __post_init__(self):
+        if not self.stages:
+            raise ValueError("a profile needs at least one stage")
+        if any(stage.duration <= 0 for stage in self.stages):
+            raise ValueError("every stage needs to last at least a minute")
+
+    def to_dict(self):
+        return {"name": self.name, "stages": [asdict(stage) for stage in self.stages]}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :raises ValueError: if data doesn't describe a valid profile
+        """
+        try:
+            stages = tuple(
+                Stage(str(stage["temp"]), int(stage["duration"]), bool(stage.get("alert", True)))
+                for stage in data["stages"]
+            )
+            return cls(str(data["name"]), stages)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"not a session profile: {e}") from e
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def compile(self, unit_seconds=60):
+        return CompiledProfile(self, unit_seconds)
+
+
+class CompiledProfile:
+    """
+    A profile worked out into seconds once, so finding the stage for a given second is a bisect
+    rather than walking the stages every tick, and the timer text for every second of the session
+    is already there to look up.
+    """
+    __slots__ = ("profile", "stages", "starts", "end", "boundaries", "classes", "labels")
+
+    def __init__(self, profile, unit_seconds=60):
+        """
+        :param name: profile: The SessionProfile to compile
+        :param name: unit_seconds: How many seconds in a minute (less when debugging)
+        :return: None
+        """
+        self.profile = profile
+        self.stages = profile.stages
+        self.starts = []  # second each stage starts at
+        elapsed = 0
+        for stage in profile.stages:
+            self.starts.append(elapsed)
+            elapsed += stage.duration * unit_seconds
+        self.end = elapsed
+        self.boundaries = self.starts[1:] + [self.end]  # what the scheduler waits for, the last one is the end
+        last = len(self.stages) - 1
+        self.classes = tuple(
+            STAGE_CLASSES[0] if i == 0 else STAGE_CLASSES[2] if i == last else STAGE_CLASSES[1]
+            for i in range(len(self.stages))
+        ) + (DONE_CLASS,)
+        self.labels = self.build_labels()
+
+    def build_labels(self):
+        """
+        The display for every second of the session, 0 to end: (m:ss, -m:ss remaining, status class).
+
+        :return: tuple of tuples
+        """
+        counting = [f"{second // 60}:{second % 60:02}" for second in range(self.end + 1)]
+        stage_class = self.classes[0]
+        next_start = 1
+        labels = []
+        for second, text in enumerate(counting):
+            while next_start < len(self.starts) and second >= self.starts[next_start]:
+                stage_class = self.classes[next_start]
+                next_start += 1
+            if second == self.end:
+                stage_class = DONE_CLASS
+            labels.append((text, "-" + counting[self.end - second], stage_class))
+        return tuple(labels)
+
+    def __len__(self):
+        return len(self.stages)
+
+    def stage_at(self, elapsed):
+        """
+        Which stage a given second falls in.
+
+        :param name: elapsed: Seconds into the session
+        :return: int, stage index, or len(self) once the session is over
+        """
+        if elapsed >= self.end:
+            return len(self.stages)
+        return bisect.bisect_right(self.starts, elapsed) - 1
+
+    def stage_class(self, index):
+        """
+        The status file class (green/yellow/red, white when done) for a stage index.
+
+        :return: str
+        """
+        return self.classes[index]
+
+
+def profile_from_settings(prefs, name="Default"):
+    """
+    The classic three stage session, built from the temp1-3/time2-4 settings.
+
+    :param name: prefs: AppSettings
+    :return: SessionProfile
+    """
+    return SessionProfile(name, (
+        Stage(prefs.temp1, prefs.time2),
+        Stage(prefs.temp2, prefs.time3 - prefs.time2),
+        Stage(prefs.temp3, prefs.time4 - prefs.time3),
+    ))
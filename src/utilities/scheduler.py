@@ -0,0 +1,95 @@
+"""
+Keeps session time against the clock, instead of trusting that every timer tick is exactly one second.
+"""
+import bisect
+import math
+import sys
+import time
+
+
+def monotonic_time():
+    """
+    A clock that never goes backwards and keeps counting while the machine is suspended,
+    so a session picks up where it should after the lid opens again.
+
+    :return: float, seconds
+    """
+    return time.monotonic()
+
+
+if hasattr(time, "CLOCK_BOOTTIME"):  # linux, CLOCK_MONOTONIC stops during suspend
+    def monotonic_time():
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+elif sys.platform == "darwin":  # CLOCK_MONOTONIC on mac counts sleep, time.monotonic() doesn't
+    def monotonic_time():
+        return time.clock_gettime(time.CLOCK_MONOTONIC)
+
+
+class SessionScheduler:
+    """
+    Tracks where a session is from a start timestamp. Elapsed time comes from the clock, and
+    the stage boundaries are deadlines we check against, so a late tick never pushes anything back.
+    """
+
+    def __init__(self, boundaries, clock=monotonic_time):
+        """
+        :param name: boundaries: Seconds into the session where stages change, the last one is the end
+        :param name: clock: Callable returning the current time in seconds
+        :return: None
+        """
+        self.boundaries = sorted(boundaries)
+        self.clock = clock
+        self.start_time = None
+        self.cursor = 0  # index of the next boundary we haven't reported yet
+
+    @property
+    def end(self):
+        return self.boundaries[-1]
+
+    def start(self, elapsed=0):
+        """
+        Starts the session, optionally part way in.
+
+        :param name: elapsed: Seconds already done
+        :return: None
+        """
+        self.start_time = self.clock() - elapsed
+        self.cursor = bisect.bisect_right(self.boundaries, elapsed)
+
+    def elapsed_exact(self):
+        return self.clock() - self.start_time
+
+    def elapsed(self):
+        """
+        Whole seconds since the start, capped at the end of the session.
+
+        :return: int
+        """
+        return min(int(self.elapsed_exact()), self.end)
+
+    def next_delay(self):
+        """
+        How long until the next whole second. Every stage boundary is a whole second, so this covers them too.
+
+        :return: float, seconds
+        """
+        elapsed = self.elapsed_exact()
+        return (math.floor(elapsed) + 1) - elapsed
+
+    def pop_due(self, elapsed=None):
+        """
+        Boundaries passed since the last call. Usually none or one, but can be several after a suspend.
+
+        :param name: elapsed: Seconds into the session to check against, defaults to now
+        :return: list of boundary indexes, oldest first
+        """
+        if elapsed is None:
+            elapsed = self.elapsed_exact()
+        reached = bisect.bisect_right(self.boundaries, elapsed)
+        due = list(range(self.cursor, reached))
+        self.cursor = max(self.cursor, reached)
+        return due
+
+    @property
+    def finished(self):
+        return self.cursor >= len(self.boundaries)
@@ -0,0 +1,452 @@
+"""
+The timer itself, without any widgets: the session schedule, the ding, notifications, the status file,
+the click files and the command socket. The main window shows it, --headless runs it on its own.
+"""
+import math
+import time
+from sys import platform
+from PyQt6.QtCore import QObject, QSettings, pyqtSignal
+from utilities import resource_path, get_ding_resource
+from utilities.click_watcher import ClickWatcher
+from utilities.command_server import CommandServer
+from utilities.status_writer import StatusWriter
+from utilities.status_segment import StatusSegment
+from utilities.scheduler import SessionScheduler
+from utilities.clock import SystemClock
+from utilities.settings_store import SettingsStore, AppSettings
+from utilities.notifier import NotificationDispatcher
+from utilities.audio_worker import AudioWorker
+from utilities.history import SessionHistory
+from utilities.checkpoint import SessionCheckpoint
+from utilities.profiles import profile_from_settings
+from utilities.profile_library import ProfileLibrary, DEFAULT_PROFILE
+
+DEBUG_TIME = 60 # Prod - 60
+STAGE_SETTINGS = ("temp1", "temp2", "temp3", "time2", "time3", "time4")
+
+
+class SessionTimer(QObject):
+    """
+    Runs sessions and keeps everything outside the window (status file, socket, history) up to date.
+    Only needs a QCoreApplication. Anything that draws listens to the signals below.
+    """
+    ticked = pyqtSignal(str, str)  # timer text, stage class (green/yellow/red)
+    stage_changed = pyqtSignal(str)  # temp label text, "Session Done!" at the end
+    state_changed = pyqtSignal()  # started, reset, or finished. Check started/is_complete
+    profile_changed = pyqtSignal()  # the active profile or temp unit changed
+    show_requested = pyqtSignal()  # somebody launched the timer again, or sent show
+
+    def __init__(self, status_stream=None, clock=None, parent=None, profiler=None):
+        """
+        Loads the settings and the active profile, and opens the status file, click watcher and command socket.
+
+        :param name: status_stream: Optional StreamWriter that gets every status update (--waybar mode)
+        :param name: clock: What the session runs on, SystemClock unless you're fast forwarding with a VirtualClock
+        :param name: parent: The QObject that owns the timer
+        :param name: profiler: Optional TickProfiler to time the tick path with (--profile-ticks)
+        :return: None
+        """
+        super().__init__(parent)
+        self.clock = clock or SystemClock()
+        self.settings = QSettings(
+            "UnquenchedServant", "DHV-Session-Timer"
+        )  # initialize settings
+        self.store = SettingsStore(self.settings, self)  # everything but geometry gets read from here
+        self.prefs = self.store.values
+        self.store.changed.connect(self.handle_setting_changed)
+        self.sound = resource_path(get_ding_resource())  # This is the almighty ding
+        self.audio = AudioWorker(self.sound)  # audio and notifications get loaded once we're up, see warm_up()
+        self.notifier = NotificationDispatcher()
+        self.started = False
+        self.is_complete = False  # Used to check if the session is complete, helps with the start button efficiency
+        self.elapsed_time = 0
+        self.status_writer = StatusWriter("~/dhv_timer.txt")  # writes happen off the GUI thread
+        self.status_stream = status_stream
+        try:
+            self.status_segment = StatusSegment()  # same status again, in shared memory for fast pollers
+        except OSError:
+            self.status_segment = None
+        self.library = ProfileLibrary()  # named profiles, indexed once here so switching is just a lookup
+        self.history = SessionHistory()  # every session gets logged here when it ends or gets reset
+        self.checkpoint = SessionCheckpoint()  # the running session, so a crash or restart can pick it back up
+        self.session_started_at = None
+        self.metrics = None  # a MetricsExporter puts itself here (--metrics-file), see its attach()
+        self.load_profile()
+        self.write_txt_file("0:00", "white")
+        self.profiler = profiler
+        if profiler is not None:
+            self.instrument(profiler)  # before the timer below grabs update_timer
+
+        # Single shot, re-armed every tick for the next whole second of the session
+        self.timer = self.clock.timer(self, self.update_timer)
+        self.scheduler = None
+        self.closed = False
+
+        # Waybar (or anything else) drops click files in ~, we get told when that happens
+        self.click_watcher = ClickWatcher(self)
+        self.click_watcher.toggle_requested.connect(self.toggle)
+        self.click_watcher.invert_requested.connect(self.invert)
+
+        # Local socket so scripts can drive/query us without the click files
+        handlers = {
+            "start": self.start_timer,
+            "reset": self.reset_timer,
+            "toggle": self.toggle,
+            "invert": self.invert,
+            "show": self.show_requested.emit,
+            "profile": self.switch_profile,
+            "profiles": self.list_profiles,
+            "history": self.history_summary,
+        }
+        if profiler is not None:
+            handlers["ticks"] = lambda: {"ticks": profiler.snapshot()}
+        self.command_server = CommandServer(handlers, self.status, self)
+
+    def instrument(self, profiler):
+        """
+        Times the tick path: each update_timer call and the parts of it, how far apart ticks land,
+        and how late each one fired past its whole second.
+
+        :param name: profiler: The TickProfiler to record into
+        :return: None
+        """
+        for name in ("handle_timer_label", "write_txt_file", "publish_segment", "handle_time_change", "handle_notification"):
+            profiler.wrap(self, name)
+        profiler.wrap(self.audio, "play", "ding")  # queueing it, the sound loads on warm_up now
+        profiler.wrap(self.store, "flush", "settings_flush")  # settings reads are attribute reads, the disk is here
+        profiler.wrap(self, "update_timer")
+        update_timer = self.update_timer
+        arm_timer = self.arm_timer
+        deadline = [0]
+
+        def timed_arm():
+            arm_timer()
+            deadline[0] = math.floor(self.scheduler.elapsed_exact()) + 1  # the whole second arm_timer aimed for
+
+        def timed_update():
+            profiler.tick(max(0.0, self.scheduler.elapsed_exact() - deadline[0]))
+            update_timer()
+
+        self.arm_timer = timed_arm
+        self.update_timer = timed_update
+
+    def write_txt_file(self, timer_text, color_class="green"):
+        data = {
+            "text": timer_text,
+            "class": color_class
+        }
+        self.status_text = data["text"]
+        self.status_class = data["class"]
+        self.status_writer.write(data)
+        if self.status_stream is not None:
+            self.status_stream.write(data)
+        self.publish_segment()
+
+    def publish_segment(self):
+        if self.status_segment is not None:
+            self.status_segment.write(
+                self.elapsed_time, self.session.end, self.session.stage_at(self.elapsed_time) + 1, self.started,
+                self.prefs.inverted_time, self.is_complete, self.status_class, self.status_text,
+            )
+
+    def load_profile(self):
+        """
+        Loads the active profile and works it out into seconds. Default is the classic three stages from the
+        temp/time settings, anything else comes out of the profile library.
+
+        :return: None
+        """
+        self.profile = None
+        if self.prefs.active_profile != DEFAULT_PROFILE:
+            self.profile = self.library.get(self.prefs.active_profile)  # None if it got deleted or broken, use Default
+        if self.profile is None:
+            try:
+                self.profile = profile_from_settings(self.prefs)
+            except ValueError:
+                self.profile = profile_from_settings(AppSettings())  # times out of order, use the defaults
+        self.compiled = self.profile.compile(DEBUG_TIME)
+        if not self.started:
+            self.session = self.compiled  # a running session keeps the profile it started with
+        self.temp_type = self.prefs.temp_type
+
+    def handle_setting_changed(self, name):
+        """
+        Picks up new session settings as soon as they're saved. A running session keeps the times it started with.
+
+        :param name: name: The setting that changed
+        :return: None
+        """
+        if name in STAGE_SETTINGS and self.prefs.active_profile != DEFAULT_PROFILE:
+            self.store.set("active_profile", DEFAULT_PROFILE)  # editing the three stages means going back to them
+            return  # that change brings us right back here
+        if name in STAGE_SETTINGS + ("temp_type", "active_profile"):
+            self.load_profile()
+            self.profile_changed.emit()
+        elif name == "inverted_time":
+            self.publish_segment()
+
+    def switch_profile(self, name):
+        """
+        Makes a profile from the library the active one. A running session keeps the one it started with.
+
+        :param name: name: The profile name
+        :return: dict, merged into the command socket reply
+        """
+        if name not in self.library:
+            return {"ok": False, "error": f"no profile named {name}"}
+        self.store.set("active_profile", name)
+        return {"profile": self.profile.name}
+
+    def list_profiles(self):
+        return {"profiles": self.library.names(), "active": self.profile.name}
+
+    def history_summary(self):
+        return {"history": dict(self.history.summary(), per_day=self.history.sessions_per_day())}
+
+    def first_temp_text(self):
+        return f"Temp: {self.session.stages[0].temp}°{self.temp_type}"
+
+    def warm_up(self):
+        """
+        Loads the heavy stuff (pygame, plyer) once we're up, so it's ready before the first ding.
+        Whatever is switched off in the settings stays unloaded until it gets switched on and used.
+
+        :return: None
+        """
+        if self.prefs.almightyDing:
+            self.audio.start()  # loads pygame and the ding on its own thread
+        if self.prefs.notifications:
+            self.notifier.start()  # loads plyer on its own thread
+
+    def close(self):
+        """
+        Shuts everything down. Safe to call more than once, and anything still poking the timer afterwards
+        (a dialog left open past the main window, say) finds it stopped rather than writing to closed files.
+
+        :return: None
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.timer.stop()  # first, a tick after this would write to the segment we're about to unmap
+        if self.metrics is not None:
+            self.metrics.close()  # first, its last write still reads the workers' stats
+        self.store.flush()
+        self.command_server.close()
+        self.status_writer.close()
+        self.notifier.close()
+        self.audio.close()
+        self.history.close()
+        self.checkpoint.close()  # a session still running gets resumed next launch
+        if self.status_segment is not None:
+            self.status_segment.close()
+            self.status_segment = None
+
+    def toggle(self):
+        if self.started:
+            self.reset_timer()
+        else:
+            self.start_timer()
+
+    def invert(self):
+        self.toggle_inverted()
+        if self.started:
+            self.handle_timer_label()
+
+    def toggle_inverted(self):
+        self.store.toggle("inverted_time")
+
+    def status(self):
+        """
+        Snapshot of where the timer is at, handed out over the command socket.
+
+        :return: dict
+        """
+        return {
+            "running": self.started,
+            "complete": self.is_complete,
+            "elapsed": self.elapsed_time,
+            "stage": self.session.stage_at(self.elapsed_time) + 1,
+            "text": self.status_text,
+            "class": self.status_class,
+            "inverted": self.prefs.inverted_time,
+            "profile": self.session.profile.name,
+        }
+
+    def start_timer(self):
+        """
+        This is done for efficiency sake.
+        Allows the user to press the start button at the end of a completed session to start a new one, but
+        reset_timer() takes a little time, which isn't great when you want to start a timer.
+        This only calls reset_timer() if the timer is active, otherwise it starts the timer without doing that.
+
+        :return: None
+        """
+        if self.started:
+            self.reset_timer()
+        else:
+            if self.is_complete:  # Our friend is_complete is here!
+                self.is_complete = False  # No longer is_complete
+                self.reset_timer()  # reset everything, just in case (if the user hits start after the session ends to start a new one)
+            self.begin_session(time.time())
+            self.checkpoint.begin(self.session.profile.name, self.session_started_at, self.scheduler.start_time)
+
+    def begin_session(self, started_at, elapsed=0):
+        """
+        Sets the active profile running, from the start or part way in.
+
+        :param name: started_at: time.time() when the session started
+        :param name: elapsed: Seconds already done
+        :return: None
+        """
+        self.started = True
+        self.session = self.compiled
+        self.session_started_at = started_at
+        self.scheduler = SessionScheduler(self.session.boundaries, self.clock.now)
+        self.scheduler.start(elapsed)
+        if self.metrics is not None:
+            self.metrics.session_started()
+        self.arm_timer()
+        self.state_changed.emit()
+        self.command_server.publish("state", status=self.status())
+
+    def resume(self):
+        """
+        Picks up a session that was still running when we last quit, crashed or got killed.
+        Call it once whatever is showing the timer is listening to the signals.
+
+        :return: bool, whether there was one to pick up
+        """
+        record = self.checkpoint.load()
+        if record is None or self.started:
+            return False
+        profile = self.library.resolve(record.profile)
+        if profile is None:
+            self.checkpoint.clear()  # the profile is gone, nothing to go back to
+            return False
+        if profile != self.profile.name:
+            self.store.set("active_profile", profile)
+        elapsed = self.clock.now() - record.started_mono
+        wall_elapsed = time.time() - record.started_wall
+        if elapsed < 0 or abs(elapsed - wall_elapsed) > 60:
+            elapsed = wall_elapsed  # rebooted since, the session clock started over
+        self.begin_session(record.started_wall, max(0.0, elapsed))
+        self.elapsed_time = self.scheduler.elapsed()
+        if self.elapsed_time >= self.session.end:
+            self.stage_changed.emit("Session Done!")  # it ran out while we were gone, no point dinging now
+            self.stop_timer(finished=True)
+            return True
+        index = self.session.stage_at(self.elapsed_time)
+        if index > 0:
+            stage = self.session.stages[index]
+            self.handle_time_change(stage.temp, str(index + 1), alert=False)
+        self.handle_timer_label()
+        return True
+
+    def reset_timer(self):
+        """
+        Handles resetting the timer. Stops the timer, sets the elapsed_time variable to 0,
+        and goes back to the first stage of the active profile.
+
+        :return: None
+        """
+        self.stop_timer(finished=False)
+        self.elapsed_time = 0
+        self.session = self.compiled  # pick up anything that changed while it was running
+        self.publish_segment()
+        self.state_changed.emit()
+
+    def handle_time_change(self, temp, stage, alert=True):
+        if stage == "end":
+            message = "Session Done!"
+            title = "DHV - Done"
+            self.stage_changed.emit("Session Done!")
+        else:
+            message = f"Temp: {temp}°{self.temp_type}"
+            title = f"DHV - Stage {stage}"
+            self.stage_changed.emit(message)
+            if self.metrics is not None:
+                self.metrics.stage_entered(int(stage))
+        self.command_server.publish("stage", stage=stage, temp=temp, status=self.status())
+        if not alert:
+            return
+        self.handle_notification(title, message)
+        if self.prefs.almightyDing:
+            self.audio.play()
+
+    def handle_notification(self, title, message):
+        timeout = self.prefs.timeout if not platform == "darwin" else 0
+        if self.prefs.notifications:
+            self.notifier.notify(title, message, timeout)
+
+    def handle_timer_label(self):
+        second = min(self.elapsed_time, self.session.end)  # a finished session's profile can be swapped for a shorter one
+        normal_text, inverted_text, stage_class = self.session.labels[second]  # worked out when it compiled
+        timer_text = inverted_text if self.prefs.inverted_time else normal_text
+        self.ticked.emit(timer_text, stage_class)
+        self.write_txt_file(timer_text, stage_class)
+        self.command_server.publish("tick", status=self.status())
+
+    def stop_timer(self, finished=False):
+        if self.started:
+            self.log_session(finished)
+            if self.metrics is not None:
+                self.metrics.session_ended(finished)
+            if self.profiler is not None:
+                self.profiler.session_ended()
+        self.checkpoint.clear()
+        self.timer.stop()
+        self.started = False
+        self.is_complete = finished
+        self.write_txt_file("0:00", "white")
+        if finished:
+            self.state_changed.emit()  # reset_timer() lets everyone know once it's done
+        self.command_server.publish("state", status=self.status())
+
+    def arm_timer(self):
+        """
+        Sets the timer to go off on the next whole second of the session.
+
+        :return: None
+        """
+        self.timer.start(math.ceil(self.scheduler.next_delay() * 1000))
+
+    def log_session(self, finished):
+        """
+        Hands the session that just ended to the history writer.
+
+        :param name: finished: False if it got reset before the end
+        :return: None
+        """
+        elapsed = self.scheduler.elapsed()
+        stage_count = len(self.session)
+        stages_reached = stage_count if finished else min(self.session.stage_at(elapsed) + 1, stage_count)
+        self.history.record(
+            self.session_started_at, self.session.profile.name, elapsed, stages_reached, stage_count, not finished
+        )
+
+    def update_timer(self):
+        """
+        Called every second by the timer.
+        Works out elapsed_time from the clock, converts the seconds to a human readable format (mm:ss),
+        and sends the new time out. At the start of each stage of the profile (default 6, 8, and 10 minutes), it will ding
+        indicating that either an increase in temperature is needed or the session is complete. If the session is complete,
+        it stops the timer so that update_timer() is no longer called. If we were late (busy event loop, suspend),
+        we skip straight to where we should be, and only the latest stage change gets a ding.
+
+        :return: None
+        """
+        self.elapsed_time = self.scheduler.elapsed()
+        self.handle_timer_label()
+
+        due = self.scheduler.pop_due(self.elapsed_time)
+        if self.scheduler.finished:
+            self.handle_time_change("350", "end")
+            self.stop_timer(finished=True)
+            return
+        if due:
+            index = due[-1] + 1  # boundary i is the start of stage i + 1. If we missed a few, only the newest one matters
+            stage = self.session.stages[index]
+            self.checkpoint.set_stage(index)
+            self.handle_time_change(stage.temp, str(index + 1), stage.alert)
+        self.arm_timer()
@@ -0,0 +1,144 @@
+"""
+In-memory copy of the app settings, so nothing on the timer's hot path has to go to QSettings.
+"""
+from dataclasses import dataclass, fields
+from PyQt6.QtCore import QObject, QTimer, QCoreApplication, pyqtSignal
+
+FLUSH_DELAY_MS = 1000  # changes made within this window get written out together
+
+
+@dataclass(slots=True)
+class AppSettings:
+    """
+    Every setting the app reads, already converted to the right type. Names match the QSettings keys.
+    """
+    temp1: str = "350"
+    temp2: str = "375"
+    temp3: str = "400"
+    temp_type: str = "F"
+    time2: int = 6
+    time3: int = 8
+    time4: int = 10
+    notifications: bool = True
+    almightyDing: bool = True
+    timeout: int = 10000
+    inverted_time: bool = False
+    keep_active_default: bool = False
+    skip_all_updates: bool = False
+    left_mouse_action: str = "Invert Time"
+    middle_mouse_action: str = "Do Nothing"
+    right_mouse_action: str = "Start Timer"
+    active_profile: str = "Default"  # name in the profile library, Default is the three stages above
+
+
+FIELD_TYPES = {f.name: f.type for f in fields(AppSettings)}
+
+
+def decode(kind, value, default):
+    """
+    Turns whatever QSettings gave us back into kind. Bools have been saved as both True and "True" over the years.
+
+    :return: the decoded value, or default if it doesn't make sense
+    """
+    try:
+        if kind is bool:
+            return value in (True, 1) or str(value).lower() in ("true", "1")
+        return kind(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def encode(value):
+    """
+    How we store things in QSettings: everything as strings, bools as "True"/"False" like the rest of the app.
+
+    :return: str
+    """
+    return str(value)
+
+
+class SettingsStore(QObject):
+    """
+    Loads the settings once, hands them out from memory, tells everyone when one changes,
+    and writes changes back to QSettings in batches.
+    """
+    changed = pyqtSignal(str)  # the name of the setting that changed
+
+    def __init__(self, settings, parent=None):
+        """
+        Load everything from QSettings.
+
+        :param name: settings: The QSettings object to load from and save to
+        :param name: parent: The QObject that owns the store
+        :return: None
+        """
+        super().__init__(parent)
+        self.settings = settings
+        self.values = AppSettings()
+        self.dirty = set()
+        for name, kind in FIELD_TYPES.items():
+            default = getattr(self.values, name)
+            value = settings.value(name, None)
+            if value is not None:
+                setattr(self.values, name, decode(kind, value, default))
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush_due)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush_due)
+
+    def get(self, name):
+        return getattr(self.values, name)
+
+    def set(self, name, value):
+        """
+        Changes a setting in memory, schedules it to be saved, and emits changed if it actually changed.
+
+        :param name: name: The setting name
+        :param name: value: The new value, converted to the setting's type
+        :return: None
+        """
+        kind = FIELD_TYPES[name]
+        value = decode(kind, value, getattr(self.values, name))
+        if getattr(self.values, name) == value:
+            return
+        setattr(self.values, name, value)
+        self.dirty.add(name)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start(FLUSH_DELAY_MS)
+        self.changed.emit(name)
+
+    def update(self, **values):
+        for name, value in values.items():
+            self.set(name, value)
+
+    def toggle(self, name):
+        self.set(name, not getattr(self.values, name))
+
+    def reset(self, keep=()):
+        """
+        Puts every setting back to its default.
+
+        :param name: keep: Names of settings to leave alone
+        :return: None
+        """
+        defaults = AppSettings()
+        for name in FIELD_TYPES:
+            if name not in keep:
+                self.set(name, getattr(defaults, name))
+
+    def flush(self):
+        """
+        Writes any pending changes to QSettings.
+
+        :return: None
+        """
+        self.flush_timer.stop()
+        for name in self.dirty:
+            self.settings.setValue(name, encode(getattr(self.values, name)))
+        self.dirty.clear()
+
+    def flush_due(self):
+        # flush gets looked up here rather than at connect time, so a TickProfiler wrapping it sees these too
+        self.flush()
@@ -0,0 +1,52 @@
+"""
+Makes sure only one timer runs at a time. Everyone else just passes their command along to it.
+"""
+import os
+import sys
+from utilities import runtime_path
+
+LOCK_NAME = "dhv_timer.lock"
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+class InstanceLock:
+    """
+    An OS level lock on a file in the runtime dir. The OS lets go of it when the process dies, however it dies,
+    so there's never a stale lock to clean up.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or runtime_path(LOCK_NAME)
+        self.fd = None
+
+    def acquire(self):
+        """
+        Tries to take the lock without waiting.
+
+        :return: bool, True if we're the only timer running
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        if sys.platform == "win32":
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        self.fd = None
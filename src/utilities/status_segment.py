@@ -0,0 +1,148 @@
+"""
+The timer status in a small memory mapped file ($XDG_RUNTIME_DIR/dhv_timer.status), for readers that want
+to poll a lot (overlays, OBS scripts, fast status bars). Reading it is a couple of memory reads, no
+syscalls and no JSON.
+
+Layout (little endian, 64 bytes):
+    0   4s  magic b"DHVS"
+    4   B   version
+    8   Q   sequence, odd while the timer is in the middle of writing
+    16  I   elapsed seconds
+    20  I   session length in seconds
+    24  H   stage (1 based, one past the last stage once it's over)
+    26  B   flags: 1 running, 2 inverted, 4 complete
+    28  8s  status class (green/yellow/red/white), nul padded
+    36  16s timer text, nul padded
+
+From another program:
+    reader = StatusReader()
+    status = reader.read()  # SegmentStatus, or None if the timer is mid write for too long
+"""
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from utilities import runtime_path
+
+SEGMENT_FILE = "dhv_timer.status"
+SEGMENT_SIZE = 64
+MAGIC = b"DHVS"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xQ")
+BODY = struct.Struct("<IIHBx8s16s")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+BODY_OFFSET = HEADER.size
+RUNNING = 1
+INVERTED = 2
+COMPLETE = 4
+READ_RETRIES = 100
+
+
+@dataclass(frozen=True, slots=True)
+class SegmentStatus:
+    """
+    One consistent snapshot of the timer.
+    """
+    sequence: int
+    elapsed: int
+    end: int
+    stage: int
+    running: bool
+    inverted: bool
+    complete: bool
+    status_class: str
+    text: str
+
+
+class StatusSegment:
+    """
+    The timer's side: keeps the file mapped and rewrites it in place, seqlock style. The sequence number
+    goes odd before the write and even after, so a reader that sees the same even number on both
+    sides of its read knows it got a whole snapshot.
+    """
+
+    def __init__(self, path=None):
+        """
+        Creates (or takes over) the segment file and maps it.
+
+        :param name: path: Where the segment lives, dhv_timer.status in the runtime folder by default
+        :return: None
+        """
+        self.path = path or runtime_path(SEGMENT_FILE)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o600)
+        try:
+            os.ftruncate(fd, SEGMENT_SIZE)
+            self.map = mmap.mmap(fd, SEGMENT_SIZE)
+        finally:
+            os.close(fd)  # the mapping keeps the file open
+        self.sequence = SEQUENCE.unpack_from(self.map, SEQUENCE_OFFSET)[0] & ~1  # carry on from a previous run
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.sequence)
+
+    def write(self, elapsed, end, stage, running, inverted, complete, status_class, text):
+        """
+        Publishes a new snapshot. Only touches memory, the OS writes the page back whenever it likes.
+
+        :return: None
+        """
+        flags = (RUNNING if running else 0) | (INVERTED if inverted else 0) | (COMPLETE if complete else 0)
+        self.sequence += 1
+        SEQUENCE.pack_into(self.map, SEQUENCE_OFFSET, self.sequence)
+        BODY.pack_into(self.map, BODY_OFFSET, elapsed, end, stage, flags, status_class.encode(), text.encode())
+        self.sequence += 1
+        SEQUENCE.pack_into(self.map, SEQUENCE_OFFSET, self.sequence)
+
+    def close(self):
+        self.map.close()
+
+
+class StatusReader:
+    """
+    The other side, for anything that wants to watch the timer. Only needs the standard library.
+    """
+
+    def __init__(self, path=None):
+        """
+        Maps the segment read only.
+
+        :param name: path: Where the segment lives, dhv_timer.status in the runtime folder by default
+        :return: None
+        :raises OSError: if the timer has never run since boot
+        :raises ValueError: if the file isn't a status segment
+        """
+        self.path = path or runtime_path(SEGMENT_FILE)
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), SEGMENT_SIZE, access=mmap.ACCESS_READ)
+        magic, version, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{self.path} isn't a DHV timer status segment")
+
+    def sequence(self):
+        """
+        The current sequence number. Cheapest way to see if anything changed since the last read.
+
+        :return: int
+        """
+        return SEQUENCE.unpack_from(self.map, SEQUENCE_OFFSET)[0]
+
+    def read(self):
+        """
+        Reads a consistent snapshot, retrying if the timer was in the middle of writing.
+
+        :return: SegmentStatus, or None if every retry caught the timer mid write
+        """
+        for _ in range(READ_RETRIES):
+            before = SEQUENCE.unpack_from(self.map, SEQUENCE_OFFSET)[0]
+            if before & 1:
+                continue
+            elapsed, end, stage, flags, status_class, text = BODY.unpack_from(self.map, BODY_OFFSET)
+            if SEQUENCE.unpack_from(self.map, SEQUENCE_OFFSET)[0] == before:
+                return SegmentStatus(
+                    before, elapsed, end, stage, bool(flags & RUNNING), bool(flags & INVERTED),
+                    bool(flags & COMPLETE), status_class.rstrip(b"\0").decode(), text.rstrip(b"\0").decode(),
+                )
+        return None
+
+    def close(self):
+        self.map.close()
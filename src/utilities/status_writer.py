@@ -0,0 +1,157 @@
+"""
+Writes the status file (~/dhv_timer.txt) that waybar and friends read.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class StatusWriter:
+    """
+    Writes the status file from its own thread, so a slow home directory never holds up the UI.
+    Files are swapped in with a rename, readers never see a half-written file, and a write that
+    wouldn't change anything is skipped.
+    """
+
+    def __init__(self, path):
+        """
+        Start the writer thread.
+
+        :param name: path: Where the status file lives
+        :return: None
+        """
+        self.path = os.path.expanduser(path)
+        self.last_payload = None
+        self.pending = None  # (payload, time it was queued), only the newest one matters
+        self.stopping = False
+        self.condition = threading.Condition()
+        self.writes = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.thread = threading.Thread(target=self.run, name="status-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        """
+        Queue data to be written. Returns right away.
+
+        :param name: data: The dict to write out as JSON
+        :return: None
+        """
+        payload = json.dumps(data)
+        with self.condition:
+            if payload == self.last_payload:
+                self.skipped += 1
+                return
+            self.last_payload = payload
+            self.pending = (payload, time.perf_counter())
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopping:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                payload, queued_at = self.pending
+                self.pending = None
+            try:
+                self.write_atomic(payload)
+            except OSError:
+                with self.condition:
+                    self.errors += 1
+                    self.last_payload = None  # so the next write tries again
+                continue
+            latency = time.perf_counter() - queued_at
+            with self.condition:
+                self.writes += 1
+                self.last_latency = latency
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+    def write_atomic(self, payload):
+        """
+        Writes payload to a temp file next to the status file and renames it over the top.
+
+        :param name: payload: The text to write
+        :return: None
+        """
+        directory, name = os.path.split(self.path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def stats(self):
+        """
+        Write counters, latencies in seconds.
+
+        :return: dict
+        """
+        with self.condition:
+            return {
+                "writes": self.writes,
+                "skipped": self.skipped,
+                "errors": self.errors,
+                "last_latency": self.last_latency,
+                "max_latency": self.max_latency,
+                "avg_latency": self.total_latency / self.writes if self.writes else 0.0,
+            }
+
+    def close(self, timeout=1.0):
+        """
+        Flush whatever is queued and stop the thread.
+
+        :param name: timeout: How long to wait for the last write
+        :return: None
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.thread.join(timeout)
+
+
+class StreamWriter:
+    """
+    Prints the status as JSON lines, for waybar's exec with "return-type": "json".
+    """
+
+    def __init__(self, stream):
+        """
+        :param name: stream: A text stream, normally sys.stdout
+        :return: None
+        """
+        self.stream = stream
+        self.last_payload = None
+
+    def write(self, data):
+        """
+        Print data as one line, unless it's the same as the last line or the reader went away.
+
+        :param name: data: The dict to print as JSON
+        :return: None
+        """
+        if self.stream is None:
+            return
+        payload = json.dumps(data)
+        if payload == self.last_payload:
+            return
+        self.last_payload = payload
+        try:
+            self.stream.write(payload + "\n")
+            self.stream.flush()
+        except (BrokenPipeError, ValueError, OSError):
+            self.stream = None  # waybar hung up, stop talking to it
@@ -0,0 +1,184 @@
+"""
+Opt-in timing for the tick path, for when somebody says the timer lags or the ding was late.
+Turn it on with --profile-ticks or DHV_PROFILE_TICKS=1, then dump it with SIGUSR1, Ctrl+Shift+P in the
+window, or dhvctl ticks. Dumps go to stderr and tick_profile.json in the app's data folder.
+"""
+import bisect
+import functools
+import json
+import os
+import sys
+import time
+from utilities import data_path
+
+ENV_VAR = "DHV_PROFILE_TICKS"
+PROFILE_FILE = "tick_profile.json"
+# bucket upper bounds in seconds, 10us to 10s. Anything slower lands in the last (overflow) bucket
+BUCKET_BOUNDS = (
+    0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5, 1.0, 1.5, 2.0, 5.0, 10.0,
+)
+
+
+def enabled_from_env():
+    return os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+def format_bound(seconds):
+    if seconds < 0.001:
+        return f"{seconds * 1e6:g}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:g}ms"
+    return f"{seconds:g}s"
+
+
+class Histogram:
+    """
+    Fixed buckets, so memory stays the same however long it runs.
+    """
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.min = seconds if self.min is None else min(self.min, seconds)
+
+    def percentile(self, fraction):
+        """
+        Upper bound of the bucket the given fraction of samples falls in.
+
+        :return: float seconds, or None with no samples (or if it's in the overflow bucket)
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else None
+        return None
+
+    def to_dict(self):
+        buckets = {}
+        for index, count in enumerate(self.counts):
+            if count:
+                label = f"<={format_bound(BUCKET_BOUNDS[index])}" if index < len(BUCKET_BOUNDS) else f">{format_bound(BUCKET_BOUNDS[-1])}"
+                buckets[label] = count
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else None,
+            "min_ms": self.min * 1000 if self.min is not None else None,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.ms(self.percentile(0.5)),
+            "p99_ms": self.ms(self.percentile(0.99)),
+            "buckets": buckets,
+        }
+
+    @staticmethod
+    def ms(seconds):
+        return seconds * 1000 if seconds is not None else None
+
+
+class TickProfiler:
+    """
+    A named histogram per thing being timed. Methods get timed by swapping in a wrapper on the instance,
+    so nothing changes (or costs anything) when profiling is off.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.started_at = time.time()
+        self.last_tick = None
+
+    def histogram(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def wrap(self, obj, method_name, name=None):
+        """
+        Times every call to obj.method_name from now on.
+
+        :param name: obj: The object that owns the method
+        :param name: method_name: The method to time
+        :param name: name: Histogram name, the method name by default
+        :return: None
+        """
+        method = getattr(obj, method_name)
+        histogram = self.histogram(name or method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter() - started)
+
+        setattr(obj, method_name, timed)
+
+    def tick(self, lateness):
+        """
+        Notes a tick: the gap since the last one, and how far past its whole second it fired.
+
+        :param name: lateness: Seconds between the deadline and when the tick actually ran
+        :return: None
+        """
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.record("tick_interval", now - self.last_tick)
+        self.last_tick = now
+        self.record("tick_lateness", lateness)
+
+    def session_ended(self):
+        """
+        The timer stopped. Forgets the last tick so the first one of the next session isn't timed against it,
+        which would put however long the timer sat idle into tick_interval.
+
+        :return: None
+        """
+        self.last_tick = None
+
+    def snapshot(self):
+        """
+        :return: dict, everything recorded so far
+        """
+        return {
+            "since": self.started_at,
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+    def dump(self, path=None):
+        """
+        Writes a snapshot to stderr and to the profile file. Runs straight from a shortcut or signal,
+        so a file that can't be written only gets a note on stderr, an exception would take the timer down.
+
+        :param name: path: Where to write it, tick_profile.json in the data folder by default
+        :return: str, the path written to, or None if the file couldn't be written
+        """
+        text = json.dumps(self.snapshot(), indent=2)
+        print(text, file=sys.stderr)
+        try:
+            path = path or data_path(PROFILE_FILE)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"tick profile: couldn't save it: {e}", file=sys.stderr)
+            return None
+        return path
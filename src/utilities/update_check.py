@@ -0,0 +1,101 @@
+"""
+Checks GitHub for a newer release, in the background, so startup never waits on the network.
+"""
+import json
+import os
+import threading
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+from utilities import data_path
+
+RELEASES_URL = "https://api.github.com/repos/unquenchedservant/DHV-Session-Timer/releases/latest"
+CACHE_FILE = "latest_release.json"
+CACHE_TTL = 6 * 60 * 60  # seconds, we don't release that often
+TIMEOUT = (3, 5)  # connect, read
+
+
+class UpdateChecker(QObject):
+    """
+    Looks up the latest release on a worker thread and emits update_available if it isn't the one we're running.
+    The last answer is cached on disk, and GitHub is asked with If-None-Match so an unchanged release costs next to nothing.
+    """
+    update_available = pyqtSignal(str)  # the release name
+
+    def __init__(self, current_version, url=RELEASES_URL, cache_file=None, ttl=CACHE_TTL, timeout=TIMEOUT, parent=None):
+        """
+        :param name: current_version: The version we're running, e.g. "v1.05"
+        :param name: url: Where to ask, GitHub's latest release API by default
+        :param name: cache_file: Where to keep the last answer
+        :param name: ttl: Seconds a cached answer is good for before we ask again
+        :param name: timeout: requests timeout, (connect, read) seconds
+        :return: None
+        """
+        super().__init__(parent)
+        self.current_version = current_version
+        self.url = url
+        self.cache_file = cache_file or data_path(CACHE_FILE, cache=True)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.thread = None
+
+    def start(self):
+        """
+        Kicks off the check. Returns right away.
+
+        :return: None
+        """
+        self.thread = threading.Thread(target=self.run, name="update-check", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        version_name = self.latest_version()
+        if version_name and version_name != self.current_version:
+            self.update_available.emit(version_name)
+
+    def latest_version(self):
+        """
+        The latest release name: from the cache if it's fresh, otherwise from GitHub.
+        Falls back to whatever we cached last if GitHub can't be reached.
+
+        :return: str, or None if we have no idea
+        """
+        cache = self.load_cache()
+        if cache.get("name") and time.time() - cache.get("fetched_at", 0) < self.ttl:
+            return cache["name"]
+        import requests  # only needed when we actually go to the network
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache.get("etag") and cache.get("name"):
+            headers["If-None-Match"] = cache["etag"]
+        try:
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:  # nothing new, doesn't count against the rate limit either
+                cache["fetched_at"] = time.time()
+            elif response.ok:
+                cache = {
+                    "name": response.json()["name"],
+                    "etag": response.headers.get("ETag"),
+                    "fetched_at": time.time(),
+                }
+            else:
+                return cache.get("name")
+        except (requests.RequestException, ValueError, KeyError):
+            return cache.get("name")
+        self.save_cache(cache)
+        return cache.get("name")
+
+    def load_cache(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def save_cache(self, cache):
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            pass  # we'll just ask again next time
@@ -0,0 +1,74 @@
+"""
+Shared setup for the tests. Everything runs headless (offscreen Qt, dummy audio), and every test gets its own
+home, data and runtime folders so nothing touches the real ones or leaks between tests.
+
+Run from the repo root:
+    python3 -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SRC))
+
+# before anything imports Qt or pygame
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+SESSION_HOME = tempfile.mkdtemp(prefix="dhv-tests-")
+os.environ["HOME"] = SESSION_HOME
+os.environ["XDG_CONFIG_HOME"] = os.path.join(SESSION_HOME, ".config")  # QSettings, shared by the whole run
+
+import pytest
+from PyQt6.QtCore import QSettings
+from PyQt6.QtWidgets import QApplication
+
+
+@pytest.fixture(autouse=True)
+def isolated_paths(tmp_path, monkeypatch):
+    """
+    Fresh home, data and runtime folders (status file, socket, history, checkpoint...) for each test.
+    """
+    for name in ("home", "data", "cache", "run"):
+        (tmp_path / name).mkdir(mode=0o700)
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    return QApplication.instance() or QApplication([])  # widgets too, for the windows
+
+
+@pytest.fixture
+def settings(qapp):
+    """
+    The app's QSettings, emptied before and after the test.
+    """
+    settings = QSettings("UnquenchedServant", "DHV-Session-Timer")
+    settings.clear()
+    yield settings
+    settings.clear()
+    settings.sync()
+
+
+@pytest.fixture
+def pump(qapp):
+    """
+    Runs the Qt event loop until a condition holds, for anything that answers through signals or sockets.
+
+    pump(lambda: reply is not None, timeout=2.0) -> bool, whether it held in time
+    """
+    def run(condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            qapp.processEvents()
+            time.sleep(0.001)
+        return True
+    return run
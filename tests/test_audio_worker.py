@@ -0,0 +1,152 @@
+"""
+The audio worker: one thread however many sessions run, a bounded queue that drops instead of blocking,
+and nothing holding up the exit.
+"""
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from utilities import session_timer
+from utilities.audio_worker import AudioWorker
+from utilities.clock import VirtualClock
+from utilities.command_client import socket_name
+from utilities.session_timer import SessionTimer
+from conftest import SRC
+
+SESSIONS = 2000
+
+
+class FakePlayer:
+    available = True
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def play(self):
+        time.sleep(self.delay)
+        self.calls.append("play")
+
+    def stop(self):
+        self.calls.append("stop")
+
+    def set_volume(self, volume):
+        self.calls.append(("set_volume", volume))
+
+
+def test_thread_count_stays_put_across_sessions(settings, monkeypatch):
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 1)
+    clock = VirtualClock()
+    timer = SessionTimer(clock=clock)
+    player = FakePlayer()
+    timer.audio.close()
+    timer.audio = AudioWorker(timer.sound, loader=lambda path: player)
+    timer.store.set("notifications", False)  # each one gets a short lived helper thread, see NotificationDispatcher
+    try:
+        timer.start_timer()
+        clock.run()
+        baseline = threading.active_count()  # the audio thread is up now
+        for session in range(SESSIONS):
+            timer.start_timer()
+            clock.run()
+            assert timer.is_complete
+            if session % 100 == 0:
+                assert threading.active_count() == baseline
+        assert threading.active_count() == baseline
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            stats = timer.audio.stats()
+            if stats["played"] + stats["dropped"] == (SESSIONS + 1) * 3:  # every ding played or knowingly dropped
+                break  # an empty queue isn't enough, the last one can still be playing
+            time.sleep(0.01)
+        stats = timer.audio.stats()
+        assert stats["played"] + stats["dropped"] == (SESSIONS + 1) * 3
+        assert stats["played"] == len(player.calls)
+        assert [t.name for t in threading.enumerate()].count("audio") == 1
+    finally:
+        timer.close()
+    assert not timer.audio.thread.is_alive()
+
+
+def test_full_queue_drops_instead_of_waiting():
+    loaded = threading.Event()
+    release = threading.Event()
+    player = FakePlayer()
+
+    def slow_loader(path):
+        loaded.set()
+        release.wait(2)
+        return player
+
+    worker = AudioWorker("ding.mp3", loader=slow_loader, max_pending=4)
+    worker.start()
+    assert loaded.wait(2)
+    started = time.perf_counter()
+    accepted = [worker.submit("play") for _ in range(10)]
+    assert time.perf_counter() - started < 0.05
+    assert accepted == [True] * 4 + [False] * 6
+    release.set()
+    deadline = time.monotonic() + 2
+    while worker.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker.set_volume(0.5) is None  # room again
+    while len(player.calls) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert player.calls == ["play"] * 4 + [("set_volume", 0.5)]
+    assert worker.stats()["dropped"] == 6
+    worker.close()
+
+
+def test_close_is_prompt_with_a_ding_playing():
+    player = FakePlayer(delay=0.2)
+    worker = AudioWorker("ding.mp3", loader=lambda path: player)
+    for _ in range(4):
+        worker.play()
+    time.sleep(0.05)  # first one playing, the rest queued
+    started = time.perf_counter()
+    worker.close()
+    assert time.perf_counter() - started < 0.5
+    assert not worker.thread.is_alive()
+    assert len(player.calls) <= 1  # the queued ones were dropped, not played out
+    assert worker.submit("play") is False
+
+
+def test_a_broken_player_doesnt_stop_the_worker():
+    def broken(path):
+        raise RuntimeError("no audio device")
+
+    worker = AudioWorker("ding.mp3", loader=broken)
+    worker.play()
+    worker.close()
+    assert not worker.thread.is_alive()
+    assert worker.stats()["available"] is False
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGTERM") or sys.platform == "win32", reason="needs POSIX signals")
+def test_headless_app_exits_promptly_on_sigterm():
+    env = dict(os.environ, DHV_PROFILE_TICKS="0")
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--headless", "start"], cwd=SRC, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_name()):
+            assert process.poll() is None, process.stderr.read().decode()
+            assert time.monotonic() < deadline, "the timer never came up"
+            time.sleep(0.02)
+        time.sleep(0.3)  # let warm_up start the audio thread
+        started = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=3) == 0
+        took = time.perf_counter() - started
+        print(f"\nexited {took * 1000:.0f} ms after SIGTERM")
+        assert took < 1.5
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stderr.close()
@@ -0,0 +1,143 @@
+"""
+The session checkpoint: what goes to disk and when, long profile names, and a timer killed at random points
+coming back to the same session.
+"""
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import pytest
+from utilities import data_path, session_timer
+from utilities.checkpoint import SessionCheckpoint
+from utilities.clock import VirtualClock
+from utilities.command_client import CommandClient
+from utilities.profile_library import ProfileLibrary, LIBRARY_FILE, MAX_NAME_BYTES
+from utilities.profiles import SessionProfile, Stage
+from utilities.session_timer import SessionTimer
+from conftest import SRC
+
+LONG_NAME = "Kräuter " * 8  # 72 bytes, 64 characters
+LONG_NAME = LONG_NAME.encode()[:MAX_NAME_BYTES].decode(errors="ignore")  # as long as a name can be
+
+
+def save_profile(name, minutes=(2, 4, 6)):
+    library = ProfileLibrary(data_path(LIBRARY_FILE))
+    library.save(SessionProfile(name, tuple(Stage(str(350 + 10 * i), m) for i, m in enumerate(minutes))))
+    return library
+
+
+def test_names_over_the_limit_are_refused():
+    library = ProfileLibrary(data_path(LIBRARY_FILE))
+    with pytest.raises(ValueError):
+        library.save(SessionProfile("ä" * (MAX_NAME_BYTES // 2 + 1), (Stage("350", 1),)))
+    library.save(SessionProfile("ä" * (MAX_NAME_BYTES // 2), (Stage("350", 1),)))
+    assert "ä" * (MAX_NAME_BYTES // 2) in ProfileLibrary(data_path(LIBRARY_FILE))
+
+
+def test_longest_name_round_trips(tmp_path):
+    checkpoint = SessionCheckpoint(str(tmp_path / "session.checkpoint"))
+    checkpoint.begin(LONG_NAME, 1000.0, 50.0)
+    checkpoint.close()
+    assert len(LONG_NAME.encode()) <= MAX_NAME_BYTES
+    assert SessionCheckpoint(str(tmp_path / "session.checkpoint")).load().profile == LONG_NAME
+
+
+def test_a_name_cut_short_by_an_old_checkpoint_still_resolves(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text('{"version": 1, "profiles": [{"name": "' + "Kräuter " * 10
+                    + '", "stages": [{"temp": "350", "duration": 4}]}]}', encoding="utf-8")
+    library = ProfileLibrary(str(path))
+    cut = ("Kräuter " * 10).encode()[:MAX_NAME_BYTES].decode(errors="ignore")
+    assert library.resolve(cut) == "Kräuter " * 10
+    assert library.resolve("Kräuter " * 10) == "Kräuter " * 10
+    assert library.resolve("Kräuter") is None
+
+
+def test_resume_with_the_longest_name(settings):
+    save_profile(LONG_NAME)
+    clock = VirtualClock()
+    timer = SessionTimer(clock=clock)
+    timer.switch_profile(LONG_NAME)
+    timer.start_timer()
+    clock.advance(30)  # under a minute off the wall clock, or it looks like a reboot
+    timer.close()  # like getting killed, the checkpoint stays
+
+    timer = SessionTimer(clock=clock)
+    try:
+        assert timer.resume()
+        assert timer.started and timer.session.profile.name == LONG_NAME
+        assert timer.elapsed_time == 30
+    finally:
+        timer.close()
+
+
+def test_no_writes_on_ticks(settings, monkeypatch):
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 1)
+    clock = VirtualClock()
+    timer = SessionTimer(clock=clock)
+    try:
+        timer.store.update(time2=5, time3=10, time4=15)
+        timer.start_timer()
+        clock.run()
+        assert timer.is_complete
+        # begin, stage 2, stage 3, then cleared at the end, 15 ticks in between and none of them wrote
+        assert timer.checkpoint.writes == 4
+        assert timer.checkpoint.syncs == 3
+    finally:
+        timer.close()
+
+
+def launch(*args):
+    return subprocess.Popen(
+        [sys.executable, "main.py", "--headless", *args], cwd=SRC, env=dict(os.environ, DHV_PROFILE_TICKS="0"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+
+
+def ask(process, cmd):
+    """
+    Sends a command once the timer's listening. The socket file outlives a killed timer, so keep trying to connect.
+
+    :return: dict, the reply
+    """
+    deadline = time.monotonic() + 10
+    while True:
+        assert process.poll() is None, process.stderr.read().decode()
+        try:
+            client = CommandClient()
+        except OSError:
+            assert time.monotonic() < deadline, "the timer never came up"
+            time.sleep(0.02)
+            continue
+        try:
+            return client.send(cmd)
+        finally:
+            client.close()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs POSIX signals")
+def test_killed_at_random_points_comes_back_to_the_same_session():
+    save_profile(LONG_NAME, minutes=(1, 2, 30))
+    rng = random.Random(4)
+    process = launch("--profile", LONG_NAME)
+    try:
+        assert ask(process, "start")["ok"]
+        started = time.monotonic()
+        for _ in range(6):
+            time.sleep(rng.uniform(0, 1.5))  # anywhere from mid startup to a few ticks in
+            process.kill()
+            process.wait()
+            process.stderr.close()
+            process = launch()
+            status = ask(process, "status")["status"]
+            expected = time.monotonic() - started
+            assert status["running"], status
+            assert status["profile"] == LONG_NAME
+            assert expected - 2 <= status["elapsed"] <= expected + 1
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stderr.close()
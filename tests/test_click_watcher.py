@@ -0,0 +1,43 @@
+"""
+The waybar click files, picked up from directory events on ~.
+"""
+import os
+from utilities import click_watcher
+from utilities.click_watcher import ClickWatcher
+from utilities.status_writer import StatusWriter
+
+
+def touch(path):
+    with open(os.path.expanduser(path), "w"):
+        pass
+
+
+def test_click_files_get_consumed(qapp, pump):
+    watcher = ClickWatcher()
+    toggled, inverted = [], []
+    watcher.toggle_requested.connect(lambda: toggled.append(1))
+    watcher.invert_requested.connect(lambda: inverted.append(1))
+    assert watcher.event_driven
+    touch(click_watcher.CLICK_FILE)
+    assert pump(lambda: toggled)
+    touch(click_watcher.INVERT_FILE)
+    assert pump(lambda: inverted)
+    assert not os.path.exists(watcher.click_file) and not os.path.exists(watcher.invert_file)
+    assert toggled == [1] and inverted == [1]
+
+
+def test_status_writes_dont_try_to_remove_anything(qapp, pump, monkeypatch):
+    watcher = ClickWatcher()
+    checks = []
+    removes = []
+    check_files = watcher.check_files
+    watcher.watcher.directoryChanged.disconnect()
+    watcher.watcher.directoryChanged.connect(lambda path: (checks.append(path), check_files()))
+    monkeypatch.setattr(os, "remove", lambda path: removes.append(path))
+    writer = StatusWriter("~/dhv_timer.txt")
+    for second in range(20):
+        writer.write_atomic(f'{{"text": "0:{second:02}"}}')  # mkstemp and rename in ~, same as a tick
+        pump(lambda: False, timeout=0.01)
+    writer.close()
+    assert checks  # woken up all the same
+    assert removes == []
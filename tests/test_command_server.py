@@ -0,0 +1,147 @@
+import gc
+import json
+import socket
+import sqlite3
+import threading
+import pytest
+from utilities.command_client import socket_name
+from utilities.command_server import CommandServer
+
+
+class FakeTimer:
+    def __init__(self):
+        self.started = False
+        self.calls = []
+
+    def start(self):
+        self.started = True
+        self.calls.append("start")
+
+    def profile(self, name):
+        self.calls.append(("profile", name))
+        return {"profile": name}
+
+    def history(self):
+        raise sqlite3.OperationalError("database is locked")
+
+    def status(self):
+        return {"running": self.started}
+
+
+@pytest.fixture
+def timer(qapp):
+    timer = FakeTimer()
+    server = CommandServer(
+        {"start": timer.start, "profile": timer.profile, "history": timer.history}, timer.status
+    )
+    assert server.listening
+    timer.server = server
+    yield timer
+    server.close()
+
+
+def talk(pump, lines, replies=None):
+    """
+    Sends raw lines from another thread (the server answers on this one) and collects one reply per line.
+
+    :return: list of decoded replies
+    """
+    replies = len(lines) if replies is None else replies
+    received = []
+    done = threading.Event()
+
+    def client():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2.0)
+            sock.connect(socket_name())
+            reader = sock.makefile("rb")
+            for line in lines:
+                sock.sendall(line + b"\n")
+            for _ in range(replies):
+                received.append(json.loads(reader.readline()))
+        done.set()
+
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    assert pump(done.is_set, timeout=3.0)
+    return received
+
+
+def test_start_and_status(timer, pump):
+    start, status = talk(pump, [b'{"cmd": "start"}', b'{"cmd": "status"}'])
+    assert start == {"ok": True, "status": {"running": True}}
+    assert status["status"]["running"]
+    assert timer.calls == ["start"]
+
+
+def test_arguments_and_dict_results(timer, pump):
+    (reply,) = talk(pump, [b'{"cmd": "profile", "name": "Low temp"}'])
+    assert reply["ok"] and reply["profile"] == "Low temp"
+    assert timer.calls == [("profile", "Low temp")]
+
+
+@pytest.mark.parametrize("line", [
+    b"not json",
+    b'{"cmd": ["x"]}',
+    b'{"cmd": {"a": 1}}',
+    b'{"cmd": 5}',
+    b"[1, 2]",
+    b'"start"',
+    b'{"name": "x"}',
+    b"\xff\xfe",
+])
+def test_malformed_lines_get_an_error_and_the_server_lives(timer, pump, line):
+    bad, status = talk(pump, [line, b'{"cmd": "status"}'])
+    assert bad["ok"] is False and "error" in bad
+    assert status["ok"] is True
+    assert timer.calls == []
+
+
+def test_unknown_command_and_bad_arguments(timer, pump):
+    unknown, bad_args = talk(pump, [b'{"cmd": "explode"}', b'{"cmd": "start", "now": true}'])
+    assert unknown == {"ok": False, "error": "unknown command: explode"}
+    assert bad_args == {"ok": False, "error": "bad arguments for start"}
+
+
+def test_a_failing_handler_becomes_an_error_reply(timer, pump):
+    failed, status = talk(pump, [b'{"cmd": "history"}', b'{"cmd": "status"}'])
+    assert failed["ok"] is False
+    assert "database is locked" in failed["error"]
+    assert status["ok"] is True
+
+
+def test_subscribers_get_events(timer, pump):
+    received = []
+    subscribed = threading.Event()
+    done = threading.Event()
+
+    def client():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2.0)
+            sock.connect(socket_name())
+            reader = sock.makefile("rb")
+            sock.sendall(b'{"cmd": "subscribe"}\n')
+            received.append(json.loads(reader.readline()))
+            subscribed.set()
+            received.append(json.loads(reader.readline()))
+        done.set()
+
+    threading.Thread(target=client, daemon=True).start()
+    assert pump(subscribed.is_set)
+    timer.server.publish("tick", status={"text": "0:01"})
+    assert pump(done.is_set)
+    assert received[0]["ok"]
+    assert received[1] == {"event": "tick", "status": {"text": "0:01"}}
+
+
+def test_close_hangs_up_and_survives_garbage_collection(qapp, pump):
+    server = CommandServer({}, dict)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2.0)
+        sock.connect(socket_name())
+        assert pump(lambda: server.clients)
+        server.close()
+        del server
+        gc.collect()  # used to run the disconnected slot on a half collected server and abort
+        qapp.processEvents()
+        assert sock.recv(1) == b""  # hung up on
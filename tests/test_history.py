@@ -0,0 +1,87 @@
+"""
+The session history with 100k sessions in it: the running aggregates have to match what a scan of the
+sessions table says, and the queries have to stay quick. Run with -s for the numbers.
+"""
+import random
+import sqlite3
+import statistics
+import time
+import pytest
+from utilities.history import SessionHistory
+
+SESSIONS = 100_000
+DAY = 24 * 3600
+
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory):
+    """
+    SESSIONS random sessions spread over about three years, written through record() like the timer does.
+    """
+    path = str(tmp_path_factory.mktemp("history") / "history.sqlite3")
+    rng = random.Random(9)
+    history = SessionHistory(path, batch_delay=0.05)
+    now = time.time()
+    started = time.perf_counter()
+    for _ in range(SESSIONS):
+        stage_count = rng.randint(1, 6)
+        aborted = rng.random() < 0.1
+        history.record(
+            now - rng.uniform(0, 3 * 365 * DAY), rng.choice(("Default", "Low temp", "Convection long")),
+            rng.uniform(60, 900), rng.randint(1, stage_count) if aborted else stage_count, stage_count, aborted,
+        )
+    history.close(timeout=60)  # writes out the rest
+    assert not history.thread.is_alive() and history.errors == 0
+    print(f"\nwrote {SESSIONS} sessions in {time.perf_counter() - started:.2f} s")
+    history = SessionHistory(path)
+    yield history
+    history.close()
+
+
+def timed(query, runs=50):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = query()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def test_aggregates_match_a_full_scan(history):
+    scan = sqlite3.connect(history.path)
+    count, aborted, average = scan.execute("SELECT COUNT(*), SUM(aborted), AVG(duration) FROM sessions").fetchone()
+    assert count == SESSIONS
+    summary = history.summary()
+    assert summary["sessions"] == count
+    assert summary["average_length"] == pytest.approx(average)
+    assert summary["abort_rate"] == pytest.approx(aborted / count)
+
+    daily = scan.execute(
+        "SELECT day, COUNT(*), SUM(aborted), SUM(duration) FROM sessions GROUP BY day ORDER BY day DESC"
+    ).fetchall()
+    kept = history.query("SELECT day, sessions, aborted, total_duration FROM daily ORDER BY day DESC")
+    assert [row[:3] for row in kept] == [row[:3] for row in daily]
+    assert [row[3] for row in kept] == pytest.approx([row[3] for row in daily])
+    assert history.sessions_per_day(30) == [row[:2] for row in daily[:30]]
+
+    weekly = scan.execute(
+        "SELECT strftime('%Y-%W', day) AS week, COUNT(*) FROM sessions GROUP BY week ORDER BY week DESC LIMIT 8"
+    ).fetchall()
+    assert history.sessions_per_week(8) == weekly
+    scan.close()
+
+
+def test_query_latency(history):
+    scan = sqlite3.connect(history.path)
+    _, summary = timed(history.summary)
+    _, per_day = timed(lambda: history.sessions_per_day(30))
+    _, per_week = timed(lambda: history.sessions_per_week(8))
+    _, full_scan = timed(
+        lambda: scan.execute("SELECT COUNT(*), SUM(aborted), AVG(duration) FROM sessions").fetchone(), runs=5
+    )
+    scan.close()
+    print(f"\nwith {SESSIONS} sessions (median): summary {summary * 1000:.3f} ms, per day {per_day * 1000:.3f} ms, "
+          f"per week {per_week * 1000:.3f} ms, vs scanning sessions {full_scan * 1000:.1f} ms")
+    assert summary < 0.002
+    assert per_day < 0.005
+    assert per_week < 0.02  # groups the daily rows, about a thousand of them for three years
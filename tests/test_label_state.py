@@ -0,0 +1,56 @@
+"""
+The timer label's looks: set_label_state() against the inline setStyleSheet calls it replaced, with the app
+style sheet loaded like main.py does. Run with -s for the numbers.
+"""
+import os
+import statistics
+import time
+import pytest
+from PyQt6.QtGui import QColor, QPalette
+from UI.main_screen import TimerApp
+from conftest import SRC
+
+STATES = ("green", "yellow", "red", "done", "idle")
+COLORS = {"green": "#66bb6a", "yellow": "#e6c35c", "red": "#e57373", "done": "#9cb9d3"}  # from style.qss
+
+
+@pytest.fixture
+def app(settings, qapp):
+    with open(os.path.join(SRC, "asset", "style.qss")) as f:
+        qapp.setStyleSheet(f.read())
+    app = TimerApp()
+    app.show()  # Qt puts off styling widgets nobody can see
+    qapp.processEvents()
+    yield app
+    app.core.close()
+    app.deleteLater()
+    qapp.setStyleSheet("")
+
+
+def per_call(call, runs):
+    timings = []
+    for run in range(runs):
+        started = time.perf_counter()
+        call(run)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def test_the_state_picks_the_color(app):
+    for state, color in COLORS.items():
+        app.set_label_state(state)
+        assert app.timer_label.property("state") == state
+        assert app.timer_label.palette().color(QPalette.ColorRole.WindowText) == QColor(color)
+
+
+def test_state_changes_vs_set_style_sheet(app):
+    label = app.timer_label
+    changed = per_call(lambda run: app.set_label_state(STATES[run % len(STATES)]), 500)
+    app.set_label_state("green")
+    unchanged = per_call(lambda run: app.set_label_state("green"), 5000)  # most ticks
+    old_styles = [f"font-size: 48px; font-weight: bold; color: {COLORS.get(state, 'white')};" for state in STATES]
+    inline = per_call(lambda run: label.setStyleSheet(old_styles[run % len(old_styles)]), 500)
+    label.setStyleSheet("")
+    print(f"\nlabel state (median): change {changed * 1e6:.1f} us, no change {unchanged * 1e6:.2f} us, "
+          f"setStyleSheet {inline * 1e6:.1f} us")
+    assert unchanged < inline / 20
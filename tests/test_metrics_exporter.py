@@ -0,0 +1,68 @@
+"""
+The Prometheus textfile exporter: the session gauges, and the writes all staying on its own thread.
+"""
+import threading
+import pytest
+from utilities.clock import VirtualClock
+from utilities.metrics_exporter import MetricsExporter
+from utilities.session_timer import SessionTimer
+
+
+def sample(text, name):
+    for line in text.splitlines():
+        if line.startswith(f"{name} "):
+            return float(line.split()[1])
+    return None
+
+
+@pytest.fixture
+def timer(settings):
+    timer = SessionTimer(clock=VirtualClock())
+    yield timer
+    timer.close()
+
+
+def test_elapsed_follows_the_session_clock_through_a_suspend(timer, tmp_path):
+    exporter = MetricsExporter(str(tmp_path / "dhv_timer.prom"), interval=3600)
+    exporter.attach(timer)
+    timer.start_timer()
+    timer.clock.advance(30)
+    timer.clock.time += 120  # suspended, the session clock (CLOCK_BOOTTIME) kept counting and time.monotonic() didn't
+    text = exporter.render()
+    assert sample(text, "dhv_session_running") == 1
+    assert sample(text, "dhv_session_elapsed_seconds") == pytest.approx(150)
+    timer.reset_timer()
+    text = exporter.render()
+    assert sample(text, "dhv_session_running") == 0
+    assert sample(text, "dhv_session_elapsed_seconds") == 0
+    assert sample(text, "dhv_sessions_aborted_total") == 1
+
+
+def test_a_resumed_session_shows_where_it_was(timer, tmp_path):
+    timer.begin_session(0.0, 200)
+    exporter = MetricsExporter(str(tmp_path / "dhv_timer.prom"), interval=3600)
+    exporter.attach(timer)
+    text = exporter.render()
+    assert sample(text, "dhv_session_elapsed_seconds") == pytest.approx(200)
+    assert sample(text, "dhv_session_stage") == 1
+    assert sample(text, "dhv_sessions_started_total") == 1
+
+
+def test_every_write_is_on_the_metrics_thread(timer, tmp_path):
+    path = tmp_path / "dhv_timer.prom"
+    exporter = MetricsExporter(str(path), interval=3600)
+    threads = []
+    write = exporter.write
+
+    def recording_write():
+        threads.append(threading.current_thread().name)
+        write()
+
+    exporter.write = recording_write
+    exporter.attach(timer)
+    timer.start_timer()
+    exporter.close()  # the last write, showing it stopped, is the thread's too
+    assert not exporter.thread.is_alive()
+    assert threads == ["metrics", "metrics"]
+    assert sample(path.read_text(), "dhv_session_running") == 0
+    assert sample(path.read_text(), "dhv_metrics_writes_total") == 1  # counted before the last one went out
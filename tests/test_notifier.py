@@ -0,0 +1,120 @@
+"""
+NotificationDispatcher in front of a fake backend: replacing by key, the queue bound, a hung backend and the
+latency stats.
+"""
+import threading
+import time
+from utilities.notifier import NotificationDispatcher
+
+
+class FakeBackend:
+    """
+    Notes what it was asked to show. Calls can be made to hang until release().
+    """
+
+    def __init__(self, delay=0.0, hang=False):
+        self.delay = delay
+        self.shown = []
+        self.released = threading.Event()
+        if not hang:
+            self.released.set()
+
+    def __call__(self, title, message, timeout):
+        self.released.wait(5)
+        time.sleep(self.delay)
+        self.shown.append(title)
+
+    def release(self):
+        self.released.set()
+
+
+def held_dispatcher(backend, **kwargs):
+    """
+    A dispatcher whose worker sits in preload until the returned event is set, so things pile up in the queue.
+    """
+    loaded = threading.Event()
+    dispatcher = NotificationDispatcher(backend, preload=lambda: loaded.wait(5), **kwargs)
+    return dispatcher, loaded
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_a_newer_stage_replaces_one_still_queued():
+    backend = FakeBackend()
+    dispatcher, loaded = held_dispatcher(backend)
+    dispatcher.notify("DHV - Stage 2", "Set temp to 375")
+    dispatcher.notify("DHV - Stage 3", "Set temp to 400")
+    dispatcher.notify("Update available", "v1.06", key="update")
+    assert dispatcher.stats()["pending"] == 2
+    assert dispatcher.stats()["dropped"] == 1
+    loaded.set()
+    assert wait_for(lambda: dispatcher.stats()["dispatched"] == 2)
+    assert backend.shown == ["DHV - Stage 3", "Update available"]
+    dispatcher.close()
+
+
+def test_queue_is_bounded_and_drops_the_oldest():
+    backend = FakeBackend()
+    dispatcher, loaded = held_dispatcher(backend, max_pending=4)
+    started = time.perf_counter()
+    for index in range(10):
+        dispatcher.notify(f"note {index}", "", key=index)
+    assert time.perf_counter() - started < 0.05
+    assert dispatcher.stats()["pending"] == 4
+    assert dispatcher.stats()["dropped"] == 6
+    loaded.set()
+    assert wait_for(lambda: dispatcher.stats()["dispatched"] == 4)
+    assert backend.shown == [f"note {index}" for index in range(6, 10)]
+    dispatcher.close()
+
+
+def test_a_hung_backend_times_out_and_later_calls_are_dropped():
+    backend = FakeBackend(hang=True)
+    dispatcher = NotificationDispatcher(backend, preload=None, call_timeout=0.1)
+    started = time.perf_counter()
+    dispatcher.notify("DHV - Stage 2", "", key="stage 2")
+    assert wait_for(lambda: dispatcher.stats()["timed_out"] == 1)
+    assert time.perf_counter() - started < 0.5  # gave up on it, didn't wait it out
+    calls = [t.name for t in threading.enumerate()].count("notification-call")
+    dispatcher.notify("DHV - Stage 3", "", key="stage 3")
+    assert wait_for(lambda: dispatcher.stats()["dropped"] == 1)  # the first call is still stuck
+    assert [t.name for t in threading.enumerate()].count("notification-call") == calls  # no pile of threads
+    backend.release()
+    assert wait_for(lambda: not dispatcher.stuck_call.is_alive())
+    dispatcher.notify("DHV - Done", "", key="done")
+    assert wait_for(lambda: dispatcher.stats()["dispatched"] == 1)
+    assert backend.shown == ["DHV - Stage 2", "DHV - Done"]  # the stuck one did show up in the end
+    stats = dispatcher.stats()
+    assert (stats["timed_out"], stats["dropped"], stats["errors"]) == (1, 1, 0)
+    dispatcher.close()
+
+
+def test_latency_stats():
+    backend = FakeBackend(delay=0.05)
+    dispatcher = NotificationDispatcher(backend, preload=None)
+    for index in range(3):
+        dispatcher.notify(f"note {index}", "", key=index)
+        assert wait_for(lambda: dispatcher.stats()["dispatched"] == index + 1)
+    stats = dispatcher.stats()
+    assert 0.05 <= stats["last_latency"] < 1.0
+    assert stats["max_latency"] >= stats["avg_latency"] >= 0.05
+    assert stats["pending"] == 0 and stats["dropped"] == 0
+    dispatcher.close()
+
+
+def test_a_failing_backend_counts_as_an_error():
+    def broken(title, message, timeout):
+        raise RuntimeError("no notification daemon")
+
+    dispatcher = NotificationDispatcher(broken, preload=None)
+    dispatcher.notify("DHV - Stage 2", "")
+    assert wait_for(lambda: dispatcher.stats()["errors"] == 1)
+    assert dispatcher.stats()["dispatched"] == 0
+    dispatcher.close()
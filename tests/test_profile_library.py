@@ -0,0 +1,105 @@
+"""
+The profile library with thousands of profiles: load time, switch latency, and the file round trip.
+Run with -s for the numbers.
+"""
+import json
+import random
+import statistics
+import time
+import pytest
+from utilities import data_path
+from utilities.profile_library import ProfileLibrary, LIBRARY_FILE, DEFAULT_PROFILE
+from utilities.profiles import SessionProfile, Stage
+from utilities.session_timer import SessionTimer
+
+LIBRARY_SIZE = 5000
+
+
+def random_profile(rng, name):
+    stages = [
+        {"temp": str(rng.randint(300, 450)), "duration": rng.randint(1, 10), "alert": rng.random() < 0.9}
+        for _ in range(rng.randint(1, 6))
+    ]
+    return {"name": name, "stages": stages}
+
+
+@pytest.fixture
+def library_file():
+    """
+    A profiles.json with LIBRARY_SIZE profiles where the timer looks for it.
+    """
+    rng = random.Random(1)
+    names = [f"Profile {index}" for index in range(LIBRARY_SIZE)]
+    path = data_path(LIBRARY_FILE)
+    with open(path, "w") as f:
+        json.dump({"version": 1, "profiles": [random_profile(rng, name) for name in names]}, f)
+    return path, names
+
+
+def test_load_time(library_file):
+    path, names = library_file
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        library = ProfileLibrary(path)
+        timings.append(time.perf_counter() - started)
+    print(f"\nloading {LIBRARY_SIZE} profiles: median {statistics.median(timings) * 1000:.1f} ms")
+    assert library.names() == [DEFAULT_PROFILE] + names
+    assert len(library) == LIBRARY_SIZE + 1
+    assert statistics.median(timings) < 0.5
+
+
+def test_switch_latency(library_file, settings):
+    _, names = library_file
+    timer = SessionTimer()
+    try:
+        rng = random.Random(2)
+        timings = []
+        for name in rng.sample(names, 1000):
+            started = time.perf_counter()
+            reply = timer.switch_profile(name)
+            timings.append(time.perf_counter() - started)
+            assert reply == {"profile": name}
+            assert timer.session.profile.name == name
+        timings.sort()
+        print(f"\nswitching between {LIBRARY_SIZE} profiles: median {statistics.median(timings) * 1000:.3f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:.3f} ms")
+        assert statistics.median(timings) < 0.005
+        assert settings.value("active_profile") is None  # nothing written yet, it goes out in one batch
+        assert timer.store.dirty == {"active_profile"}
+        timer.store.flush()
+        assert settings.value("active_profile") == timer.profile.name
+        assert timer.switch_profile("No such profile") == {"ok": False, "error": "no profile named No such profile"}
+    finally:
+        timer.close()
+
+
+def test_save_remove_round_trip(tmp_path):
+    path = str(tmp_path / "profiles.json")
+    library = ProfileLibrary(path)
+    library.save(SessionProfile("Low temp", (Stage("340", 5), Stage("360", 5, alert=False))))
+    library.save(SessionProfile("Convection long", (Stage("380", 12),)))
+    reloaded = ProfileLibrary(path)
+    assert reloaded.names() == [DEFAULT_PROFILE, "Low temp", "Convection long"]
+    assert reloaded.get("Low temp") == library.get("Low temp")
+    reloaded.remove("Low temp")
+    assert ProfileLibrary(path).names() == [DEFAULT_PROFILE, "Convection long"]
+    with pytest.raises(ValueError):
+        library.save(SessionProfile(DEFAULT_PROFILE, (Stage("350", 1),)))
+
+
+def test_broken_entries_are_skipped(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"version": 1, "profiles": [
+        {"name": "Good", "stages": [{"temp": "350", "duration": 4}]},
+        {"name": "No stages", "stages": []},
+        {"name": "Bad duration", "stages": [{"temp": "350", "duration": "soon"}]},
+        {"stages": [{"temp": "350", "duration": 4}]},
+        "not a profile",
+    ]}))
+    library = ProfileLibrary(str(path))
+    assert library.get("Good").stages == (Stage("350", 4),)
+    assert library.get("No stages") is None
+    assert library.get("Bad duration") is None
+    path.write_text("{broken")
+    assert ProfileLibrary(str(path)).names() == [DEFAULT_PROFILE]
@@ -0,0 +1,141 @@
+"""
+Drift and jitter of the session clock with the event loop stalling (notifications, settings writes, suspend).
+Compares SessionScheduler against the old way of counting a second per timer tick. Run with -s to see the numbers.
+"""
+import random
+import statistics
+import pytest
+from utilities.scheduler import SessionScheduler
+
+BOUNDARIES = (360, 480, 600)  # default profile: stages at 6 and 8 minutes, done at 10
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 1000.0
+
+    def __call__(self):
+        return self.time
+
+
+def stalls(seed, ticks=700):
+    """
+    How late each tick fires: mostly a few ms, now and then a slow notification or settings write,
+    and one suspend in the middle.
+    """
+    rng = random.Random(seed)
+    delays = []
+    for index in range(ticks):
+        if index == 200:
+            delays.append(95.0)  # lid closed for a minute and a half
+        elif rng.random() < 0.05:
+            delays.append(rng.uniform(0.2, 2.5))
+        else:
+            delays.append(rng.uniform(0.0, 0.015))
+    return delays
+
+
+def run_scheduler(delays):
+    """
+    The timer as it is: a single shot armed for the next whole second, elapsed read off the clock.
+
+    :return: (list of (true elapsed, shown elapsed, tick lateness), {boundary index: seconds late})
+    """
+    clock = FakeClock()
+    scheduler = SessionScheduler(BOUNDARIES, clock)
+    scheduler.start()
+    ticks, reported = [], {}
+    for stall in delays:
+        deadline = clock.time + scheduler.next_delay()
+        clock.time = deadline + stall
+        true_elapsed = clock.time - scheduler.start_time
+        shown = scheduler.elapsed()
+        ticks.append((true_elapsed, shown, stall))
+        for index in scheduler.pop_due(shown):
+            assert index not in reported, "a boundary came round twice"
+            reported[index] = true_elapsed - BOUNDARIES[index]
+        if scheduler.finished:
+            break
+    return ticks, reported
+
+
+def run_counter(delays):
+    """
+    The timer as it was: a repeating one second QTimer and elapsed_time += 1 per timeout. A late timeout
+    pushes every later one back by the same amount.
+    """
+    now = 0.0
+    elapsed = 0
+    ticks, reported = [], {}
+    for stall in delays:
+        now += 1.0 + stall
+        elapsed += 1
+        ticks.append((now, elapsed, stall))
+        for index, boundary in enumerate(BOUNDARIES):
+            if elapsed == boundary:
+                reported[index] = now - boundary
+        if elapsed >= BOUNDARIES[-1]:
+            break
+    return ticks, reported
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_no_drift_through_stalls_and_suspend(seed):
+    delays = stalls(seed)
+    ticks, reported = run_scheduler(delays)
+    for true_elapsed, shown, _ in ticks:
+        assert shown == min(int(true_elapsed), BOUNDARIES[-1])  # never behind or ahead of the clock
+    assert sorted(reported) == [0, 1, 2]  # every stage change, once
+    for late in reported.values():
+        assert 0 <= late <= max(delays[:200] + delays[201:])  # as late as one stall at worst, never the sum
+
+
+def test_catch_up_after_suspend_reports_everything_missed():
+    clock = FakeClock()
+    scheduler = SessionScheduler(BOUNDARIES, clock)
+    scheduler.start()
+    clock.time += 500.4  # suspended through the 6 and 8 minute marks
+    assert scheduler.elapsed() == 500
+    assert scheduler.pop_due() == [0, 1]
+    assert scheduler.pop_due() == []
+    assert scheduler.next_delay() == pytest.approx(0.6)
+    clock.time += 1000
+    assert scheduler.elapsed() == 600  # capped at the end
+    assert scheduler.pop_due() == [2] and scheduler.finished
+
+
+def test_resume_part_way_skips_passed_boundaries():
+    clock = FakeClock()
+    scheduler = SessionScheduler(BOUNDARIES, clock)
+    scheduler.start(elapsed=400)
+    assert scheduler.elapsed() == 400
+    assert scheduler.pop_due() == []
+    clock.time += 80
+    assert scheduler.pop_due() == [1]
+
+
+def test_drift_and_jitter_benchmark():
+    """
+    Same stalls through both. The counter drifts by every stall it sat through; the scheduler doesn't drift,
+    and its tick lateness is the stall of that tick alone.
+    """
+    old_drift, new_drift, old_stage_late, new_stage_late, new_lateness = [], [], [], [], []
+    for seed in range(50):
+        delays = stalls(seed)
+        ticks, reported = run_scheduler(delays)
+        new_drift.append(max(abs(int(true) - shown) for true, shown, _ in ticks if true < BOUNDARIES[-1]))
+        new_stage_late.extend(reported.values())
+        new_lateness.extend(stall for _, _, stall in ticks if stall < 10)  # leave the suspend out
+        ticks, reported = run_counter(delays)
+        old_drift.append(ticks[-1][0] - ticks[-1][1])
+        old_stage_late.extend(reported.values())
+    print()
+    print(f"counter:   drift at the end median {statistics.median(old_drift):.1f} s, "
+          f"stage changes late by median {statistics.median(old_stage_late):.1f} s, max {max(old_stage_late):.1f} s")
+    print(f"scheduler: drift max {max(new_drift)} s, stage changes late by median "
+          f"{statistics.median(new_stage_late) * 1000:.1f} ms, max {max(new_stage_late):.2f} s, "
+          f"tick lateness median {statistics.median(new_lateness) * 1000:.1f} ms, "
+          f"stdev {statistics.stdev(new_lateness) * 1000:.0f} ms")
+    assert max(new_drift) == 0
+    assert max(new_stage_late) < 3.0  # the longest single non-suspend stall, never the sum of them
+    assert statistics.median(old_drift) > 60
@@ -0,0 +1,240 @@
+"""
+Whole sessions on a VirtualClock: thousands of random time2/time3/time4 setups, each run start to finish with
+its stage changes, notifications, dings and status file writes checked against when they should have happened.
+Run with -s for the per-tick overhead.
+"""
+import random
+import time
+import pytest
+from utilities import session_timer
+from utilities.clock import VirtualClock
+from utilities.history import SessionHistory
+from utilities.session_timer import SessionTimer
+
+SWEEP_SIZE = 2000
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, title, message, timeout):
+        self.sent.append((title, message))
+
+    def start(self):
+        pass
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class FakeAudio:
+    def __init__(self):
+        self.played = 0
+
+    def play(self):
+        self.played += 1
+
+    def start(self):
+        pass
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class Recorder:
+    """
+    A SessionTimer on a VirtualClock, with everything it sends out noted down against the session clock.
+    """
+
+    def __init__(self):
+        self.clock = VirtualClock()
+        self.timer = SessionTimer(clock=self.clock)
+        self.timer.notifier = FakeNotifier()
+        self.timer.audio = FakeAudio()
+        self.stages = []
+        self.writes = []
+        self.timer.stage_changed.connect(lambda text: self.stages.append((self.now(), text)))
+        write = self.timer.status_writer.write
+
+        def recording_write(data):
+            self.writes.append((self.now(), data["text"], data["class"]))
+            write(data)
+
+        self.timer.status_writer.write = recording_write
+
+    def now(self):
+        scheduler = self.timer.scheduler
+        return int(self.clock.now() - scheduler.start_time) if scheduler is not None else None  # whole seconds
+
+    def clear(self):
+        self.stages.clear()
+        self.writes.clear()
+        self.timer.notifier.sent.clear()
+        self.timer.audio.played = 0
+
+    def run_session(self, rng=None):
+        """
+        Starts a session and runs the clock until it's done. With rng, the clock now and then jumps ahead
+        without firing anything in between, like a suspend or a stalled event loop.
+
+        :return: int, ticks fired
+        """
+        self.timer.start_timer()
+        self.clear()  # after, starting over a finished session resets it first
+        fired = 0
+        while self.timer.started:
+            if rng is not None and rng.random() < 0.02:
+                self.clock.time += rng.uniform(1, 200)
+            timer = self.clock.pop_next()
+            assert timer is not None, "the session stopped ticking before it was done"
+            self.clock.fire(timer)
+            fired += 1
+        return fired
+
+
+def random_setup(rng):
+    time2 = rng.randint(1, 20)
+    time3 = rng.randint(time2 + 1, time2 + 20)
+    time4 = rng.randint(time3 + 1, time3 + 20)
+    temps = [str(rng.randint(300, 450)) for _ in range(3)]
+    return dict(time2=time2, time3=time3, time4=time4, temp1=temps[0], temp2=temps[1], temp3=temps[2])
+
+
+@pytest.fixture
+def recorder(settings):
+    recorder = Recorder()
+    yield recorder
+    recorder.timer.close()
+
+
+def check_session(recorder, setup, unit):
+    """
+    Everything that should have gone out for an on-time session, at the second it should have.
+    """
+    boundaries = [setup["time2"] * unit, setup["time3"] * unit, setup["time4"] * unit]
+    temp_type = recorder.timer.temp_type
+    assert recorder.stages == [
+        (boundaries[0], f"Temp: {setup['temp2']}°{temp_type}"),
+        (boundaries[1], f"Temp: {setup['temp3']}°{temp_type}"),
+        (boundaries[2], "Session Done!"),
+    ]
+    assert [title for title, _ in recorder.timer.notifier.sent] == ["DHV - Stage 2", "DHV - Stage 3", "DHV - Done"]
+    assert recorder.timer.audio.played == 3
+    ticks = recorder.writes[:-1]  # the last one is stop_timer putting 0:00 back
+    assert [second for second, _, _ in ticks] == list(range(1, boundaries[2] + 1))
+    for second, text, status_class in ticks:
+        assert text == f"{second // 60}:{second % 60:02}"
+        expected = "green" if second < boundaries[0] else "yellow" if second < boundaries[1] else "red"
+        assert status_class == (expected if second < boundaries[2] else "white")
+    assert recorder.writes[-1][1:] == ("0:00", "white")
+    assert recorder.timer.is_complete and not recorder.timer.started
+
+
+def test_random_setups_sweep(recorder, monkeypatch):
+    """
+    One second "minutes" (the old DEBUG_TIME trick) so thousands of setups run in a couple of seconds.
+    """
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 1)
+    rng = random.Random(7)
+    ticks = 0
+    started = time.perf_counter()
+    for _ in range(SWEEP_SIZE):
+        setup = random_setup(rng)
+        recorder.timer.store.update(**setup)
+        ticks += recorder.run_session()
+        check_session(recorder, setup, 1)
+    took = time.perf_counter() - started
+    print(f"\n{SWEEP_SIZE} sessions, {ticks} ticks in {took:.2f} s, {took / ticks * 1e6:.1f} us per tick")
+    assert took / ticks < 0.002
+
+
+def test_real_minutes(recorder):
+    rng = random.Random(11)
+    for _ in range(10):
+        setup = random_setup(rng)
+        recorder.timer.store.update(**setup)
+        recorder.run_session()
+        check_session(recorder, setup, 60)
+
+
+def test_stalls_skip_ahead_and_only_ding_the_newest_stage(recorder, monkeypatch):
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 10)
+    rng = random.Random(3)
+    for _ in range(300):
+        setup = random_setup(rng)
+        recorder.timer.store.update(**setup)
+        recorder.run_session(rng)
+        boundaries = [setup["time2"] * 10, setup["time3"] * 10, setup["time4"] * 10]
+        times = [second for second, _ in recorder.stages]
+        assert times == sorted(times) and recorder.stages[-1][1] == "Session Done!"
+        for second, text in recorder.stages:
+            # reported no earlier than its boundary, and never for a stage the session had already left
+            passed = [b for b in boundaries if b <= second]
+            assert passed
+            expected = "Session Done!" if len(passed) == 3 else f"Temp: {setup[f'temp{len(passed) + 1}']}°F"
+            assert text == expected
+        assert recorder.timer.audio.played == len(recorder.stages)
+        for second, text, _ in recorder.writes[:-1]:
+            second = min(second, boundaries[2])  # a jump past the end shows the end
+            assert text == f"{second // 60}:{second % 60:02}"  # the label always shows the real elapsed time
+
+
+def test_every_session_is_logged(recorder, monkeypatch):
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 1)
+    rng = random.Random(5)
+    for _ in range(50):
+        recorder.timer.store.update(**random_setup(rng))
+        recorder.run_session()
+    recorder.timer.start_timer()
+    recorder.clock.advance(0.5)
+    recorder.timer.reset_timer()
+    recorder.timer.close()  # writes out whatever the history writer still has queued
+    history = SessionHistory()
+    summary = history.summary()
+    history.close()
+    assert summary["sessions"] == 51
+    assert summary["abort_rate"] == pytest.approx(1 / 51)
+
+
+def test_close_stops_the_ticks_and_can_run_twice(recorder):
+    recorder.timer.start_timer()
+    recorder.clock.advance(5)
+    recorder.timer.close()
+    assert recorder.clock.pop_next() is None  # nothing left to tick onto the closed segment
+    assert recorder.timer.status_segment is None
+    recorder.timer.publish_segment()
+    recorder.timer.close()  # and again from the fixture
+
+
+def test_clicking_a_finished_session_after_a_shorter_profile_loads(settings, monkeypatch):
+    """
+    A finished session stays on its last second while the profile behind it can change to a shorter one.
+    Left click (Invert Time) used to index the new labels past their end, inside mousePressEvent.
+    """
+    from UI.main_screen import TimerApp
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 1)
+    clock = VirtualClock()
+    app = TimerApp(clock=clock)
+    try:
+        app.core.notifier = FakeNotifier()
+        app.core.audio = FakeAudio()
+        app.core.start_timer()
+        clock.run()
+        assert app.core.is_complete and app.core.elapsed_time == 10
+        app.store.set("time4", 9)
+        assert app.core.session.end == 9
+        ticks = []
+        app.core.ticked.connect(lambda text, status_class: ticks.append((text, status_class)))
+        app.handle_mouse_click("left_mouse_action")
+        app.handle_mouse_click("left_mouse_action")
+        assert ticks == [("-0:00", "white"), ("0:09", "white")]
+    finally:
+        app.core.close()
+        app.deleteLater()
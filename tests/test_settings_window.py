@@ -0,0 +1,76 @@
+"""
+Opening the settings window: the first open builds it, later ones only refresh it. Offscreen, with the dialog's
+exec() swapped for show() and one pass of the event loop, so open to visible is measured without blocking.
+Run with -s for the numbers.
+"""
+import statistics
+import time
+import pytest
+from UI.main_screen import TimerApp
+from UI.settings_screen import SettingsWindow
+
+
+@pytest.fixture
+def app(settings, qapp, monkeypatch):
+    shown = []
+
+    def exec_(dialog):
+        dialog.show()
+        qapp.processEvents()
+        shown.append(time.perf_counter())
+        dialog.hide()  # not close(), closeEvent saves
+
+    monkeypatch.setattr(SettingsWindow, "exec", exec_)
+    app = TimerApp()
+    app.shown = shown
+    yield app
+    if app.settings_window is not None:
+        app.settings_window.deleteLater()
+    app.core.close()
+    app.deleteLater()
+
+
+def open_to_visible(app):
+    started = time.perf_counter()
+    app.open_settings()
+    return app.shown[-1] - started
+
+
+def test_first_open_then_reuse(app, qapp):
+    first = open_to_visible(app)
+    window = app.settings_window
+    reuse = [open_to_visible(app) for _ in range(50)]
+    assert app.settings_window is window  # built once
+    rebuilt = []
+    for _ in range(10):  # what every open used to cost
+        started = time.perf_counter()
+        dialog = SettingsWindow(app.store, app.library)
+        dialog.exec()
+        rebuilt.append(app.shown[-1] - started)
+        dialog.deleteLater()
+    qapp.processEvents()
+    print(f"\nsettings open to visible: first {first * 1000:.2f} ms, reused median "
+          f"{statistics.median(reuse) * 1000:.2f} ms, rebuilt every time median {statistics.median(rebuilt) * 1000:.2f} ms")
+    assert statistics.median(reuse) < statistics.median(rebuilt)
+
+
+def test_reuse_shows_what_changed_since(app):
+    app.open_settings()
+    window = app.settings_window
+    app.store.update(temp1="360", time4=12, left_mouse_action="Start Timer", notifications=False)
+    window.error_msg.show()  # left over from the last time it was open
+    app.open_settings()
+    assert window.temp1_input.text() == "360"
+    assert window.time4_input.currentText() == "12"
+    assert window.left_mouse_combo.currentText() == "Start Timer"
+    assert not window.notifications_checkbox.isChecked()
+    assert window.error_msg.isHidden()
+
+
+def test_temp_unit_isnt_converted_on_refresh(app):
+    app.open_settings()
+    app.store.update(temp_type="C", temp1="180", temp2="190", temp3="200")
+    app.open_settings()
+    window = app.settings_window
+    assert window.temp_unit.currentText() == "C"
+    assert [window.temp1_input.text(), window.temp2_input.text(), window.temp3_input.text()] == ["180", "190", "200"]
@@ -0,0 +1,46 @@
+"""
+Keeps pygame, plyer and requests off the startup path.
+"""
+import os
+import signal
+import subprocess
+import sys
+import threading
+import pytest
+from conftest import SRC
+
+HEAVY = ("pygame", "plyer", "requests")
+
+
+def test_importing_the_app_loads_nothing_heavy():
+    code = (
+        "import sys\n"
+        "import UI.main_screen, utilities.session_timer\n"
+        f"print(','.join(name for name in {HEAVY!r} if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs POSIX signals")
+def test_startup_report_says_none():
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--headless", "--startup-report"], cwd=SRC,
+        env=dict(os.environ, DHV_PROFILE_TICKS="0"), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    watchdog = threading.Timer(10, process.kill)  # never reported, don't hang the run
+    watchdog.start()
+    try:
+        lines = []
+        for line in process.stderr:
+            lines.append(line.rstrip())
+            if line.startswith("startup: heavy modules"):
+                break
+        assert "startup: heavy modules loaded before ready: none" in lines, lines
+    finally:
+        watchdog.cancel()
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+        process.wait(timeout=5)
+        process.stderr.close()
@@ -0,0 +1,83 @@
+"""
+The shared memory status segment: a round trip, and readers hammering it while another process rewrites it
+as fast as it can, which is where a torn snapshot would show up.
+"""
+import subprocess
+import sys
+import textwrap
+import time
+from utilities.status_segment import StatusSegment, StatusReader
+from conftest import SRC
+
+CLASSES = ("green", "yellow", "red", "white")
+
+# every field is worked out from i, so a snapshot mixing two writes doesn't add up
+WRITER = textwrap.dedent("""
+    import os, sys
+    from utilities.status_segment import StatusSegment
+    segment = StatusSegment(sys.argv[1])
+    classes = ("green", "yellow", "red", "white")
+    i = 0
+    print("ready", flush=True)
+    while not os.path.exists(sys.argv[2]):
+        i += 1
+        segment.write(i, i + 1000, i % 60000, i % 2 == 0, i % 3 == 0, i % 5 == 0, classes[i % 4], f"{i // 60}:{i % 60:02}")
+    segment.close()
+""")
+
+
+def consistent(status):
+    i = status.elapsed
+    return (
+        status.end == i + 1000 and status.stage == i % 60000 and status.running == (i % 2 == 0)
+        and status.inverted == (i % 3 == 0) and status.complete == (i % 5 == 0)
+        and status.status_class == CLASSES[i % 4] and status.text == f"{i // 60}:{i % 60:02}"
+    )
+
+
+def test_round_trip(tmp_path):
+    segment = StatusSegment(str(tmp_path / "dhv_timer.status"))
+    reader = StatusReader(segment.path)
+    segment.write(402, 600, 2, True, True, False, "yellow", "-3:18")
+    status = reader.read()
+    assert (status.elapsed, status.end, status.stage, status.text, status.status_class) == (402, 600, 2, "-3:18", "yellow")
+    assert status.running and status.inverted and not status.complete
+    assert status.sequence == reader.sequence() and status.sequence % 2 == 0
+    segment.write(403, 600, 2, True, True, False, "yellow", "-3:17")
+    assert reader.sequence() == status.sequence + 2
+    reader.close()
+    segment.close()
+    assert StatusSegment(segment.path).sequence == status.sequence + 2  # a restart carries on counting
+
+
+def test_no_torn_reads_against_a_busy_writer(tmp_path):
+    path = str(tmp_path / "dhv_timer.status")
+    stop = tmp_path / "stop"
+    StatusSegment(path).close()
+    writer = subprocess.Popen(
+        [sys.executable, "-c", WRITER, path, str(stop)], cwd=SRC, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert writer.stdout.readline().strip() == "ready"
+        reader = StatusReader(path)
+        reads = missed = torn = 0
+        sequences = set()
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline:
+            status = reader.read()
+            if status is None:
+                missed += 1
+                continue
+            reads += 1
+            sequences.add(status.sequence)
+            if status.elapsed and not consistent(status):
+                torn += 1
+        reader.close()
+    finally:
+        stop.touch()
+        writer.wait(timeout=5)
+        writer.stdout.close()
+    print(f"\n{reads} reads of {len(sequences)} different snapshots, {torn} torn, {missed} gave up")
+    assert reads > 10000
+    assert len(sequences) > 20  # the writer kept going throughout, only a few hundred get seen on one CPU
+    assert torn == 0
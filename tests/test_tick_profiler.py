@@ -0,0 +1,79 @@
+"""
+TickProfiler hooked into a SessionTimer: what ends up in which histogram.
+"""
+import json
+import time
+import pytest
+from utilities import session_timer
+from utilities.clock import VirtualClock
+from utilities.session_timer import SessionTimer
+from utilities.tick_profiler import TickProfiler
+
+
+def test_batched_settings_flushes_get_timed(settings, pump):
+    profiler = TickProfiler()
+    timer = SessionTimer(clock=VirtualClock(), profiler=profiler)
+    try:
+        timer.store.set("time2", timer.store.get("time2") + 1)
+        assert timer.store.flush_timer.isActive()
+        assert pump(lambda: not timer.store.dirty, timeout=3.0)  # written by the flush timer, not by hand
+        assert profiler.histogram("settings_flush").count == 1
+    finally:
+        timer.close()
+
+
+def test_idle_time_between_sessions_isnt_a_tick_interval(settings, monkeypatch):
+    monkeypatch.setattr(session_timer, "DEBUG_TIME", 1)
+    clock = VirtualClock()
+    profiler = TickProfiler()
+    timer = SessionTimer(clock=clock, profiler=profiler)
+    try:
+        timer.store.update(time2=1, time3=2, time4=3)
+        for _ in range(2):
+            timer.start_timer()
+            clock.run()
+            assert timer.is_complete and profiler.last_tick is None
+            time.sleep(0.2)  # sat there finished for a bit
+        intervals = profiler.histogram("tick_interval")
+        assert intervals.count == 2 * 2  # three ticks a session, the first of each has nothing to follow
+        assert intervals.max < 0.2
+    finally:
+        timer.close()
+
+
+def test_snapshot_and_dump(tmp_path, capsys):
+    profiler = TickProfiler()
+    for lateness in (0.0004, 0.003, 0.0015):
+        profiler.tick(lateness)
+    profiler.record("render", 0.00003)
+    path = profiler.dump(str(tmp_path / "tick_profile.json"))
+    with open(path) as f:
+        saved = json.load(f)
+    assert json.loads(capsys.readouterr().err) == saved == json.loads(json.dumps(profiler.snapshot()))
+    assert saved["since"] == profiler.started_at
+    assert set(saved["histograms"]) == {"tick_lateness", "tick_interval", "render"}
+    lateness = saved["histograms"]["tick_lateness"]
+    assert set(lateness) == {"count", "mean_ms", "min_ms", "max_ms", "p50_ms", "p99_ms", "buckets"}
+    assert lateness["count"] == 3
+    assert lateness["min_ms"] == pytest.approx(0.4) and lateness["max_ms"] == pytest.approx(3.0)
+    assert lateness["p50_ms"] == pytest.approx(2.0) and lateness["p99_ms"] == pytest.approx(5.0)
+    assert lateness["buckets"] == {"<=500us": 1, "<=2ms": 1, "<=5ms": 1}
+    assert saved["histograms"]["tick_interval"]["count"] == 2
+
+
+def test_a_dump_that_cant_be_saved_doesnt_take_the_timer_down(settings, monkeypatch, tmp_path, capsys):
+    from UI.main_screen import TimerApp
+    profiler = TickProfiler()
+    app = TimerApp(clock=VirtualClock(), profiler=profiler)
+    try:
+        blocker = tmp_path / "not a folder"
+        blocker.write_text("")
+        monkeypatch.setenv("XDG_DATA_HOME", str(blocker))  # the data folder can't be made
+        app.profile_shortcut.activated.emit()  # used to raise out of the slot, which aborts
+        err = capsys.readouterr().err
+        assert "couldn't save it" in err
+        assert '"histograms"' in err  # still got printed
+        assert profiler.dump() is None
+    finally:
+        app.core.close()
+        app.deleteLater()
@@ -0,0 +1,142 @@
+"""
+UpdateChecker against a stand-in for the GitHub releases API on 127.0.0.1.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utilities.update_check import UpdateChecker
+
+
+class FakeGitHub:
+    """
+    Serves {"name": release} with an ETag, 304s a matching If-None-Match, and can be made slow or broken.
+    """
+
+    def __init__(self):
+        self.release = "v1.06"
+        self.delay = 0.0
+        self.status = 200
+        self.requests = []  # the If-None-Match header of each request, None if there wasn't one
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                owner.requests.append(self.headers.get("If-None-Match"))
+                time.sleep(owner.delay)
+                try:
+                    self.respond()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up waiting, which is the point of the slow tests
+
+            def respond(self):
+                etag = f'"{owner.release}"'
+                if owner.status != 200:
+                    self.send_response(owner.status)
+                    self.end_headers()
+                elif self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                else:
+                    body = json.dumps({"name": owner.release}).encode()
+                    self.send_response(200)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/releases/latest"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def github():
+    github = FakeGitHub()
+    yield github
+    github.close()
+
+
+@pytest.fixture
+def make_checker(qapp, tmp_path, github):
+    def make(ttl=3600, timeout=(2, 2), url=None, version="v1.05"):
+        return UpdateChecker(version, url=url or github.url, cache_file=str(tmp_path / "release.json"),
+                             ttl=ttl, timeout=timeout)
+    return make
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/releases/latest"  # nobody listening once the socket's closed
+
+
+def test_fetch_then_cache_within_ttl(github, make_checker):
+    assert make_checker().latest_version() == "v1.06"
+    github.release = "v1.07"
+    assert make_checker().latest_version() == "v1.06"  # still fresh, no request made
+    assert github.requests == [None]
+
+
+def test_stale_cache_sends_the_etag_and_takes_a_304(github, make_checker):
+    assert make_checker(ttl=0).latest_version() == "v1.06"
+    assert make_checker(ttl=0).latest_version() == "v1.06"
+    assert github.requests == [None, '"v1.06"']
+    github.release = "v1.07"  # new release, the old etag doesn't match any more
+    assert make_checker(ttl=0).latest_version() == "v1.07"
+    assert github.requests[-1] == '"v1.06"'
+
+
+def test_slow_server_times_out_to_the_cache(github, make_checker):
+    assert make_checker(ttl=0).latest_version() == "v1.06"
+    github.delay = 1.0
+    github.release = "v1.07"
+    started = time.perf_counter()
+    assert make_checker(ttl=0, timeout=(0.2, 0.2)).latest_version() == "v1.06"
+    assert time.perf_counter() - started < 0.8
+
+
+def test_offline_or_broken_falls_back(github, make_checker):
+    assert make_checker(url=closed_port_url()).latest_version() is None  # nothing cached, no idea
+    assert make_checker(ttl=0).latest_version() == "v1.06"
+    assert make_checker(ttl=0, url=closed_port_url()).latest_version() == "v1.06"
+    github.status = 500
+    assert make_checker(ttl=0).latest_version() == "v1.06"
+
+
+def test_junk_cache_file_is_ignored(github, make_checker, tmp_path):
+    (tmp_path / "release.json").write_text("[not, json")
+    assert make_checker().latest_version() == "v1.06"
+
+
+def test_start_returns_before_the_network_answers(github, make_checker, pump):
+    github.delay = 0.5
+    found = []
+    checker = make_checker()
+    checker.update_available.connect(found.append)
+    started = time.perf_counter()
+    checker.start()
+    assert time.perf_counter() - started < 0.05  # startup carries on straight away
+    assert found == []
+    assert pump(lambda: found, timeout=3.0)
+    assert found == ["v1.06"]
+
+
+def test_no_signal_when_up_to_date(github, make_checker):
+    found = []
+    checker = make_checker(version="v1.06")
+    checker.update_available.connect(found.append)
+    checker.start()
+    checker.thread.join(2.0)
+    assert found == []